@@ -1,3 +1,4 @@
+import os
 import sys
 import multiprocessing
 import re
@@ -6,17 +7,18 @@ from vnpy.trader.constant import Exchange
 from vnpy.trader.object import BarData, TickData
 from enum import Enum
 from time import sleep
-from datetime import datetime, time
-from logging import INFO
+from datetime import datetime
+from logging import INFO, getLogger
 
-from vnpy.event import EventEngine
+from vnpy.event import EventEngine, EVENT_TIMER
 from vnpy.trader.setting import SETTINGS
 from vnpy.trader.engine import MainEngine
-from vnpy.trader.utility import extract_vt_symbol
+from vnpy.trader.session import TradingSessionCalendar
 
 from vnpy.gateway.ctp import CtpGateway
 from vnpy.app.cta_strategy.base import EVENT_CTA_LOG
-from vnpy.app.data_recorder.engine import RecorderEngine
+from vnpy.app.data_recorder.engine import RecorderEngine, QueuePolicy
+from vnpy.app.data_recorder.shard import ShardRouter
 
 from vnpy.trader.tqz_extern.tools.position_operator.position_operator import TQZJsonOperator
 from vnpy.trader.tqz_extern.tools.file_path_operator.file_path_operator import TQZFilePathOperator
@@ -43,6 +45,18 @@ CTP_SETTING = {
     "产品信息": ""
 }
 
+STRATEGIES_PATH = TQZFilePathOperator.father_path(source_path=__file__) + f'/strategies.json'
+
+# 白名单文件检查间隔(秒)
+WHITELIST_CHECK_INTERVAL = 5
+
+# 录制写入进程数量(0为不分片, 在录制进程内写入), 按交易所(exchange)或合约哈希(symbol)分片
+SHARD_COUNT = 0
+SHARD_BY = "exchange"
+
+# 与LogEngine相同的logger, 白名单解析错误输出到交易日志
+logger = getLogger("VN Trader")
+
 def is_futures(vt_symbol: str) -> bool:
     """
     是否是期货
@@ -50,24 +64,68 @@ def is_futures(vt_symbol: str) -> bool:
     return bool(re.match(r"^[a-zA-Z]{1,3}\d{2,4}.[A-Z]+$", vt_symbol))
 
 
-def is_hft(vt_symbol: str) -> bool:
-    # strategies_path = "strategies.json"
-    strategies_path = TQZFilePathOperator.father_path(source_path=__file__) + f'/strategies.json'
-    content = TQZJsonOperator.tqz_load_jsonfile(jsonfile=strategies_path)
+class HftWhitelist:
+    """
+    hft合约白名单: 只解析一次strategies.json中active的hft策略, 文件修改时间变化后重新加载
+    """
+
+    def __init__(self, strategies_path: str):
+        self.strategies_path = strategies_path
+        self.mtime = None
+        self.vt_symbols = frozenset()
 
-    code_list = []
-    [code_list.append(hft_strategy['params']['code']) for hft_strategy in content['strategies']['hft']]
+        self.reload()
 
-    vt_symbol_list = []
-    for code in code_list:
-        exchange = code.split('.')[0]
-        symbol = code.split('.')[1]
-        year_month = code.split('.')[2]
-        if exchange == 'CZCE':
-            year_month = int(year_month) % 1000
-        vt_symbol_list.append(f'{symbol}{year_month}.{exchange}')
+    def reload(self) -> bool:
+        """
+        文件有修改则重新加载, 返回白名单是否变化
+        """
+        try:
+            mtime = os.path.getmtime(self.strategies_path)
+        except OSError:
+            return False
 
-    return vt_symbol in vt_symbol_list
+        if mtime == self.mtime:
+            return False
+
+        # 文件写入中(内容不完整)时保留原白名单, 下次再重试
+        content = TQZJsonOperator.tqz_load_jsonfile(jsonfile=self.strategies_path)
+        if not content:
+            return False
+
+        # 手工编辑的文件格式错误时保留原白名单, 不让异常中断事件线程
+        self.mtime = mtime
+        try:
+            vt_symbols = frozenset(self.parse(content))
+        except Exception as e:
+            logger.error(f"解析白名单文件{self.strategies_path}失败, 保留原白名单: {e!r}")
+            return False
+
+        if vt_symbols == self.vt_symbols:
+            return False
+
+        self.vt_symbols = vt_symbols
+        return True
+
+    @staticmethod
+    def parse(content: dict) -> list:
+        vt_symbol_list = []
+        for hft_strategy in content['strategies']['hft']:
+            if not hft_strategy.get('active', False):
+                continue
+
+            code = hft_strategy['params']['code']
+            exchange = code.split('.')[0]
+            symbol = code.split('.')[1]
+            year_month = code.split('.')[2]
+            if exchange == 'CZCE':
+                year_month = int(year_month) % 1000
+            vt_symbol_list.append(f'{symbol}{year_month}.{exchange}')
+
+        return vt_symbol_list
+
+    def __contains__(self, vt_symbol: str) -> bool:
+        return vt_symbol in self.vt_symbols
 
 
 class RecordMode(Enum):
@@ -75,29 +133,47 @@ class RecordMode(Enum):
     TICK = "tick"
 
 class WholeMarketRecorder(RecorderEngine):
-    def __init__(self, main_engine, event_engine, record_modes=[RecordMode.TICK]):
-        super().__init__(main_engine, event_engine)
-        self.record_modes = record_modes
-        # 非交易时间
-        self.drop_start = time(3, 15)
-        self.drop_end = time(8, 45)
+    # 收盘时子进程被terminate, 未入库数据在下次启动时从WAL回放
+    wal_enabled = True
+
+    # 数据库写入过慢时限制队列长度, 队列满时丢弃同合约最早的tick.
+    # 只录制白名单合约, 而白名单合约不做合并, 所以不使用CONFLATE策略
+    queue_size = 1000000
+    queue_policy = QueuePolicy.DROP_OLDEST
+
+    def __init__(self, main_engine, event_engine, record_modes=[RecordMode.TICK], shard_count=0, shard_by="exchange"):
+        self.whitelist = HftWhitelist(STRATEGIES_PATH)
+        self.timer_count = 0
+
+        # 交易时段日历, 与父进程共用
+        self.calendar = TradingSessionCalendar()
 
-        # 大连、上海、郑州交易所，小节休息
-        self.rest_start = time(10, 15)
-        self.rest_end = time(10, 30)
+        # 父类初始化时已启动录制线程并推送事件, 需先定义
+        self.shard_router = None
+        self.shard_counts = None
 
-    def istrading(self, vt_symbol, current_time) -> bool:
+        super().__init__(main_engine, event_engine)
+        self.record_modes = record_modes
+        self.queue.whitelist = self.whitelist
+
+        # 分片录制, tick由多个写入进程保存
+        if shard_count:
+            self.shard_router = ShardRouter(
+                shard_count=shard_count,
+                shard_by=shard_by,
+                exchanges=EXCHANGE_LIST,
+                batch_size=self.batch_size,
+                flush_interval=self.flush_interval
+            )
+            self.shard_router.start()
+
+        self.event_engine.register(EVENT_TIMER, self.process_timer_event)
+
+    def istrading(self, vt_symbol, dt) -> bool:
         """
         交易时间，过滤校验Tick
         """
-        symbol, exchange = extract_vt_symbol(vt_symbol)
-
-        if self.drop_start <= current_time < self.drop_end:
-            return False
-        if exchange in [Exchange.DCE, Exchange.SHFE, Exchange.CZCE]:
-            if self.rest_start <= current_time < self.rest_end:
-                return False
-        return True
+        return self.calendar.is_trading(vt_symbol, dt)
 
     def load_setting(self):
         pass
@@ -106,34 +182,132 @@ class WholeMarketRecorder(RecorderEngine):
         """
         抛弃非交易时间校验数据
         """
-        tick_time = tick.datetime.time()
-        if not self.istrading(tick.vt_symbol, tick_time):
+        if not self.istrading(tick.vt_symbol, tick.datetime):
             return
-        task = ("tick", copy(tick))
-        # print("在录tick")
-        self.queue.put(task)
+        if self.shard_router:
+            self.shard_router.put(tick)
+            return
+
+        # tick推送后不会再被修改, 直接传引用不再copy
+        task = ("tick", tick)
+        self.put_task(task)
+
+    def record_ticks(self, ticks: list):
+        """
+        批量录制tick, 同样抛弃非交易时间数据并按分片路由
+        """
+        ticks = [tick for tick in ticks if self.istrading(tick.vt_symbol, tick.datetime)]
+        if not ticks:
+            return
+
+        if self.shard_router:
+            for tick in ticks:
+                self.shard_router.put(tick)
+            return
+
+        tasks = [("tick", tick) for tick in ticks]
+        self.put_tasks(tasks)
 
     def record_bar(self, bar: BarData):
         """
         抛弃非交易时间校验数据
         """
-        bar_time = bar.datetime.time()
-        if not self.istrading(bar.vt_symbol, bar_time):
+        if not self.istrading(bar.vt_symbol, bar.datetime):
             return
         task = ("bar", copy(bar))
-        self.queue.put(task)
+        self.put_task(task)
+
+    def get_statistics(self) -> dict:
+        """
+        录制统计, 分片录制时包括分片丢弃数量和写入进程状态
+        """
+        statistics = super().get_statistics()
+        if self.shard_router:
+            statistics.update(self.shard_router.get_statistics())
+        return statistics
+
+    def get_update_data(self) -> dict:
+        """"""
+        data = super().get_update_data()
+        if self.shard_router:
+            data["shard_dropped"] = self.shard_router.dropped_count
+            data["shard_alive"] = [p.is_alive() for p in self.shard_router.processes]
+        return data
+
+    def check_shedding(self):
+        """
+        分片环形缓冲区满丢弃tick或写入进程退出时, 输出日志并推送更新事件
+        """
+        super().check_shedding()
+
+        if not self.shard_router:
+            return
+
+        for n in self.shard_router.check_writers():
+            self.write_log(f"分片{n}写入进程已退出, 该分片tick将被丢弃")
+
+        counts = (
+            self.shard_router.dropped_count,
+            tuple(p.is_alive() for p in self.shard_router.processes)
+        )
+        if counts != self.shard_counts:
+            self.shard_counts = counts
+            self.put_event()
+
+    def close(self):
+        """"""
+        super().close()
+
+        if self.shard_router:
+            self.shard_router.close()
 
     def process_contract_event(self, event):
         """"""
         contract = event.data
         vt_symbol = contract.vt_symbol
         # 不录制期权 & 只录制hft合约
-        if is_futures(vt_symbol) and is_hft(vt_symbol=vt_symbol):
-            if RecordMode.BAR in self.record_modes:
-                self.add_bar_recording(vt_symbol)
-            if RecordMode.TICK in self.record_modes:
-                self.add_tick_recording(vt_symbol)
-            self.subscribe(contract)
+        if is_futures(vt_symbol) and vt_symbol in self.whitelist:
+            self.add_recording(contract)
+
+    def add_recording(self, contract):
+        """"""
+        vt_symbol = contract.vt_symbol
+        if RecordMode.BAR in self.record_modes:
+            self.add_bar_recording(vt_symbol)
+        if RecordMode.TICK in self.record_modes:
+            self.add_tick_recording(vt_symbol)
+        self.subscribe(contract)
+
+    def process_timer_event(self, event):
+        """
+        定时检查strategies.json, 白名单变化后增删录制合约
+        """
+        self.timer_count += 1
+        if self.timer_count < WHITELIST_CHECK_INTERVAL:
+            return
+        self.timer_count = 0
+
+        if not self.whitelist.reload():
+            return
+
+        for vt_symbol in list(self.tick_recordings.keys()):
+            if vt_symbol not in self.whitelist:
+                self.remove_tick_recording(vt_symbol)
+
+        for vt_symbol in list(self.bar_recordings.keys()):
+            if vt_symbol not in self.whitelist:
+                self.remove_bar_recording(vt_symbol)
+
+        for vt_symbol in self.whitelist.vt_symbols:
+            # 与process_contract_event一致, 不录制期权
+            if not is_futures(vt_symbol):
+                continue
+            if vt_symbol in self.tick_recordings or vt_symbol in self.bar_recordings:
+                continue
+
+            contract = self.main_engine.get_contract(vt_symbol)
+            if contract:
+                self.add_recording(contract)
 
 
 def run_child():
@@ -142,7 +316,8 @@ def run_child():
     """
     SETTINGS["log.file"] = True
 
-    event_engine = EventEngine()
+    # 录制进程不需要按合约订阅tick事件
+    event_engine = EventEngine(topics=False)
     main_engine = MainEngine(event_engine)
     main_engine.add_gateway(CtpGateway)
     main_engine.write_log("主引擎创建成功")
@@ -155,7 +330,12 @@ def run_child():
     main_engine.connect(CTP_SETTING, "CTP")
     main_engine.write_log("连接 ctp 接口")
 
-    whole_market_recorder = WholeMarketRecorder(main_engine, event_engine)
+    whole_market_recorder = WholeMarketRecorder(
+        main_engine,
+        event_engine,
+        shard_count=SHARD_COUNT,
+        shard_by=SHARD_BY
+    )
 
     main_engine.write_log("开始录制数据")
     oms_engine = main_engine.get_engine("oms")
@@ -169,34 +349,14 @@ def run_parent():
     """
     print("启动dataRecord策略守护父进程")
 
-    # Chinese futures market trading period (day/night)
-    MORNING_START = time(8, 45)
-    MORNING_END = time(12, 0)
-
-    AFTERNOON_START = time(12, 45)
-    AFTERNOON_END = time(15, 35)
-
-    NIGHT_START = time(20, 45)
-    NIGHT_END = time(3, 5)
+    # Chinese futures market trading period (day/night), shared with tick filter
+    calendar = TradingSessionCalendar()
 
     child_process = None
 
     while True:
-        current_time = datetime.now().time()
-        trading = False
-
-        # Check whether in trading period
-        if (
-            (MORNING_START <= current_time <= MORNING_END)
-            or (AFTERNOON_START <= current_time <= AFTERNOON_END)
-            or (current_time >= NIGHT_START)
-            or (current_time <= NIGHT_END)
-        ):
-            trading = True
-        else:
-            # print("非录制时间")
-            pass
-        
+        trading = calendar.is_recording_time(datetime.now(), lead=15, lag=30)
+
         # Start child process in trading period
         if trading and child_process is None:
             print("启动数据录制子进程")
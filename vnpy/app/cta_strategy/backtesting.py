@@ -21,7 +21,7 @@ from vnpy.trader.constant import (
     Interval,
     Status
 )
-from vnpy.trader.database import database_manager
+from vnpy.trader.database.cache import range_cache
 from vnpy.trader.object import OrderData, TradeData, BarData, TickData
 from vnpy.trader.utility import round_to
 
@@ -578,6 +578,22 @@ class BacktestingEngine:
             self.output("优化目标未设置，请检查")
             return
 
+        # Write history into disk cache once, so that every worker
+        # opens the same cache files instead of querying database
+        if range_cache.disk_enabled:
+            if self.mode == BacktestingMode.BAR:
+                interval = self.interval
+            else:
+                interval = None
+
+            range_cache.load_array(
+                self.symbol,
+                self.exchange,
+                interval,
+                self.start,
+                self.end or datetime.now()
+            )
+
         # Use multiprocessing pool for running backtesting with different setting
         # Force to use spawn method to create new process (instead of fork on Linux)
         ctx = multiprocessing.get_context("spawn")
@@ -1285,7 +1301,6 @@ def ga_optimize(parameter_values: list):
     return _ga_optimize(tuple(parameter_values))
 
 
-@lru_cache(maxsize=999)
 def load_bar_data(
     symbol: str,
     exchange: Exchange,
@@ -1294,12 +1309,11 @@ def load_bar_data(
     end: datetime
 ):
     """"""
-    return database_manager.load_bar_data(
+    return range_cache.load_bar_data(
         symbol, exchange, interval, start, end
     )
 
 
-@lru_cache(maxsize=999)
 def load_tick_data(
     symbol: str,
     exchange: Exchange,
@@ -1307,7 +1321,7 @@ def load_tick_data(
     end: datetime
 ):
     """"""
-    return database_manager.load_tick_data(
+    return range_cache.load_tick_data(
         symbol, exchange, start, end
     )
 
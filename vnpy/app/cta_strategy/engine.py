@@ -41,6 +41,7 @@ from vnpy.trader.constant import (
 
 from vnpy.trader.utility import extract_vt_symbol, round_to
 from vnpy.trader.database import database_manager
+from vnpy.trader.database.cache import range_cache
 from vnpy.trader.rqdata import rqdata_client
 from vnpy.trader.converter import OffsetConverter
 from vnpy.trader.object import PositionData
@@ -669,7 +670,7 @@ class CtaEngine(BaseEngine):
                 bars = self.query_bar_from_rq(symbol, exchange, interval, start, end)
 
         if not bars:
-            bars = database_manager.load_bar_data(symbol=symbol, exchange=exchange, interval=interval, start=start,end=end)
+            bars = range_cache.load_bar_data(symbol=symbol, exchange=exchange, interval=interval, start=start, end=end)
 
         for bar in bars:
             callback(bar)
@@ -1,16 +1,40 @@
 import csv
-from datetime import datetime
-from typing import List, Dict, Tuple
+import os
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Tuple, Optional, Sequence
+
+import numpy as np
 
 from vnpy.trader.engine import BaseEngine, MainEngine, EventEngine
 from vnpy.trader.constant import Interval, Exchange
 from vnpy.trader.object import BarData, HistoryRequest
 from vnpy.trader.database import database_manager
+from vnpy.trader.database.database import (
+    DB_TZ,
+    BAR_FIELDS,
+    TICK_FIELDS,
+    BAR_DTYPE,
+    TICK_DTYPE
+)
+from vnpy.trader.database.database_async import AsyncDatabaseManager
+from vnpy.trader.database.cache import range_cache
+from vnpy.trader.database.rollup import rollup_ticks
 from vnpy.trader.rqdata import rqdata_client
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
 
 APP_NAME = "DataManager"
 
+# Rows per record batch when reading, and per row group when writing
+PARQUET_BATCH_SIZE = 100000
+PARQUET_COMPRESSION = "zstd"
+
 
 class ManagerEngine(BaseEngine):
     """"""
@@ -23,6 +47,8 @@ class ManagerEngine(BaseEngine):
         """"""
         super().__init__(main_engine, event_engine, APP_NAME)
 
+        self.async_database: AsyncDatabaseManager = AsyncDatabaseManager(database_manager)
+
     @staticmethod
     def import_data_from_csv(
         file_path: str,
@@ -81,6 +107,7 @@ class ManagerEngine(BaseEngine):
         database_manager.save_bar_data(bars)
 
         end = bar.datetime
+        range_cache.invalidate(symbol, exchange, interval, start, end)
         return start, end, count
 
     def output_data_to_csv(
@@ -131,23 +158,272 @@ class ManagerEngine(BaseEngine):
             return False
 
     @staticmethod
-    def get_bar_data_available() -> List[Dict]:
-        """"""
+    def output_data_to_parquet(
+        file_path: str,
+        symbol: str,
+        exchange: Exchange,
+        interval: Optional[Interval],
+        start: datetime,
+        end: datetime
+    ) -> int:
+        """
+        Export bar data (or tick data if interval is None) into
+        compressed parquet file, return count of rows written.
+
+        Data is loaded as numpy arrays one day at a time, and each
+        day is written as row groups of the file.
+        """
+        if not pq:
+            raise ImportError("pyarrow is required for parquet export")
+
+        if interval:
+            data_type = "bar"
+        else:
+            data_type = "tick"
+
+        metadata = {
+            "type": data_type,
+            "symbol": symbol,
+            "exchange": exchange.value,
+            "interval": interval.value if interval else "",
+        }
+
+        # Query with naive datetime in database timezone, so that
+        # records at day boundary are compared correctly in SQLite
+        if start.tzinfo:
+            start = start.astimezone(DB_TZ).replace(tzinfo=None)
+        if end.tzinfo:
+            end = end.astimezone(DB_TZ).replace(tzinfo=None)
+
+        writer = None
+        count = 0
+        day_start = start
+
+        try:
+            while day_start <= end:
+                day_end = min(day_start + timedelta(days=1) - timedelta(microseconds=1), end)
+
+                if interval:
+                    array = database_manager.load_bar_arrays(
+                        symbol, exchange, interval, day_start, day_end
+                    )
+                else:
+                    array = database_manager.load_tick_arrays(
+                        symbol, exchange, day_start, day_end
+                    )
+
+                day_start += timedelta(days=1)
+
+                if not len(array):
+                    continue
+
+                columns = {}
+                for name in array.dtype.names:
+                    column = array[name]
+                    if column.dtype.kind == "S":
+                        column = np.char.decode(column, "utf-8", errors="ignore")
+                    columns[name] = column
+
+                table = pa.table(columns)
+
+                if not writer:
+                    schema = table.schema.with_metadata(metadata)
+                    writer = pq.ParquetWriter(
+                        file_path, schema, compression=PARQUET_COMPRESSION
+                    )
+
+                writer.write_table(table.cast(writer.schema), row_group_size=PARQUET_BATCH_SIZE)
+                count += len(array)
+        finally:
+            if writer:
+                writer.close()
+
+        return count
+
+    @staticmethod
+    def import_data_from_parquet(
+        file_path: str,
+        symbol: str = "",
+        exchange: Exchange = None,
+        interval: Interval = None
+    ) -> Tuple:
+        """
+        Import bar or tick data from parquet file exported by
+        output_data_to_parquet. Symbol/exchange/interval are read
+        from file metadata if not given.
+
+        File is read by record batches, and each batch is converted
+        into numpy array and saved into database with array API, so
+        whole file is never held in memory.
+        """
+        if not pq:
+            raise ImportError("pyarrow is required for parquet import")
+
+        parquet_file = pq.ParquetFile(file_path)
+
+        metadata = {
+            k.decode(): v.decode()
+            for k, v in (parquet_file.schema_arrow.metadata or {}).items()
+        }
+        data_type = metadata.get("type", "bar")
+
+        if not symbol:
+            symbol = metadata["symbol"]
+        if not exchange:
+            exchange = Exchange(metadata["exchange"])
+        if not interval and data_type == "bar":
+            interval = Interval(metadata["interval"])
+
+        if data_type == "bar":
+            fields = BAR_FIELDS
+            dtype = BAR_DTYPE
+        else:
+            fields = TICK_FIELDS
+            dtype = TICK_DTYPE
+            interval = None
+
+        start = None
+        end = None
+        count = 0
+
+        for batch in parquet_file.iter_batches(batch_size=PARQUET_BATCH_SIZE):
+            if not batch.num_rows:
+                continue
+
+            # Columns are copied into array directly, no BarData/TickData
+            # object is created for each row
+            array = np.zeros(batch.num_rows, dtype=dtype)
+            array["datetime"] = batch.column("datetime").to_numpy().astype("M8[us]")
+
+            for name in fields:
+                array[name] = np.nan_to_num(
+                    batch.column(name).to_numpy(zero_copy_only=False).astype(float)
+                )
+
+            if data_type == "bar":
+                database_manager.save_bar_arrays(array, symbol, exchange, interval)
+            else:
+                array["name"] = [
+                    name.encode("utf-8") if name else b""
+                    for name in batch.column("name").to_pylist()
+                ]
+                database_manager.save_tick_arrays(array, symbol, exchange)
+
+            if not start:
+                start = DB_TZ.localize(array["datetime"][0].item())
+            end = DB_TZ.localize(array["datetime"][-1].item())
+            count += len(array)
+
+        # Ticks appended into staging table are otherwise only merged
+        # by recorder, merge them so that they can be loaded at once
+        if data_type == "tick":
+            database_manager.merge_staging()
+
+        if count:
+            range_cache.invalidate(symbol, exchange, interval, start, end)
+
+        return start, end, count
+
+    @staticmethod
+    def rollup_tick_data(
+        symbol: str,
+        exchange: Exchange,
+        start: date,
+        end: date,
+        windows: Sequence[int] = (),
+        folder_path: str = ""
+    ) -> Dict:
+        """
+        Rollup recorded ticks of trading days into 1-minute, hourly and
+        daily bars saved into database. N-minute bars of windows are
+        written into CSV file {symbol}.{exchange}_{window}m.csv in
+        folder_path, with same columns as output_data_to_csv.
+        """
+        # Columns of CSV file and fields of bar array
+        columns = {
+            "open": "open_price",
+            "high": "high_price",
+            "low": "low_price",
+            "close": "close_price",
+            "volume": "volume",
+            "open_interest": "open_interest",
+        }
+        fieldnames = ["symbol", "exchange", "datetime"] + list(columns)
+
+        files = {}
+        writers = {}
+
+        def write_window(window: int, array: np.ndarray) -> None:
+            """"""
+            writer = writers.get(window, None)
+            if not writer:
+                file_path = os.path.join(
+                    folder_path, f"{symbol}.{exchange.value}_{window}m.csv"
+                )
+                files[window] = open(file_path, "w")
+                writer = csv.DictWriter(
+                    files[window], fieldnames=fieldnames, lineterminator="\n"
+                )
+                writer.writeheader()
+                writers[window] = writer
+
+            dts = array["datetime"].tolist()
+            values = [array[name].tolist() for name in columns.values()]
+
+            for dt, *row in zip(dts, *values):
+                d = {
+                    "symbol": symbol,
+                    "exchange": exchange.value,
+                    "datetime": dt.strftime("%Y-%m-%d %H:%M:%S"),
+                }
+                d.update(zip(columns, row))
+                writer.writerow(d)
+
+        try:
+            counts = rollup_ticks(
+                symbol,
+                exchange,
+                start,
+                end,
+                database_manager=database_manager,
+                windows=windows,
+                on_window=write_window
+            )
+        finally:
+            for f in files.values():
+                f.close()
+
+        return counts
+
+    def get_bar_data_available(self) -> List[Dict]:
+        """
+        Queries of oldest/newest bar are submitted at once and run
+        concurrently in database thread pool.
+        """
         data = database_manager.get_bar_data_statistics()
 
+        # Time range is already provided by database with overview
+        if all("start" in d for d in data):
+            return data
+
+        futures = []
         for d in data:
-            oldest_bar = database_manager.get_oldest_bar_data(
-                d["symbol"], Exchange(d["exchange"]), Interval(d["interval"])
-            )
-            d["start"] = oldest_bar.datetime
+            args = (d["symbol"], Exchange(d["exchange"]), Interval(d["interval"]))
+            futures.append((
+                self.async_database.get_oldest_bar_data(*args),
+                self.async_database.get_newest_bar_data(*args)
+            ))
 
-            newest_bar = database_manager.get_newest_bar_data(
-                d["symbol"], Exchange(d["exchange"]), Interval(d["interval"])
-            )
-            d["end"] = newest_bar.datetime
+        for d, (oldest_future, newest_future) in zip(data, futures):
+            d["start"] = oldest_future.result().datetime
+            d["end"] = newest_future.result().datetime
 
         return data
 
+    def close(self):
+        """"""
+        self.async_database.close()
+
     @staticmethod
     def load_bar_data(
         symbol: str,
@@ -179,6 +455,7 @@ class ManagerEngine(BaseEngine):
             exchange,
             interval
         )
+        range_cache.invalidate(symbol, exchange, interval)
 
         return count
 
@@ -217,6 +494,9 @@ class ManagerEngine(BaseEngine):
 
         if data:
             database_manager.save_bar_data(data)
+            range_cache.invalidate(
+                symbol, exchange, req.interval, data[0].datetime, data[-1].datetime
+            )
             return len(data)
 
         return 0
@@ -43,12 +43,16 @@ class ManagerWidget(QtWidgets.QWidget):
         download_button = QtWidgets.QPushButton("下载数据")
         download_button.clicked.connect(self.download_data)
 
+        rollup_button = QtWidgets.QPushButton("合成K线")
+        rollup_button.clicked.connect(self.rollup_data)
+
         hbox1 = QtWidgets.QHBoxLayout()
         hbox1.addWidget(refresh_button)
         hbox1.addStretch()
         hbox1.addWidget(import_button)
         hbox1.addWidget(update_button)
         hbox1.addWidget(download_button)
+        hbox1.addWidget(rollup_button)
 
         hbox2 = QtWidgets.QHBoxLayout()
         hbox2.addWidget(self.tree)
@@ -387,6 +391,13 @@ class ManagerWidget(QtWidgets.QWidget):
         dialog = DownloadDialog(self.engine)
         dialog.exec_()
 
+    def rollup_data(self) -> None:
+        """"""
+        dialog = RollupDialog(self.engine)
+        n = dialog.exec_()
+        if n == dialog.Accepted:
+            self.refresh_tree()
+
     def show(self) -> None:
         """"""
         self.showMaximized()
@@ -585,3 +596,96 @@ class DownloadDialog(QtWidgets.QDialog):
 
         count = self.engine.download_bar_data(symbol, exchange, interval, start)
         QtWidgets.QMessageBox.information(self, "下载结束", f"下载总数据量：{count}条")
+
+
+class RollupDialog(QtWidgets.QDialog):
+    """"""
+
+    def __init__(self, engine: ManagerEngine, parent=None):
+        """"""
+        super().__init__()
+
+        self.engine = engine
+
+        self.setWindowTitle("从Tick数据合成K线")
+        self.setFixedWidth(300)
+
+        self.setWindowFlags(
+            (self.windowFlags() | QtCore.Qt.CustomizeWindowHint)
+            & ~QtCore.Qt.WindowMaximizeButtonHint)
+
+        self.symbol_edit = QtWidgets.QLineEdit()
+
+        self.exchange_combo = QtWidgets.QComboBox()
+        for i in Exchange:
+            self.exchange_combo.addItem(str(i.name), i)
+
+        end_dt = datetime.now()
+        start_dt = end_dt - timedelta(days=30)
+
+        self.start_date_edit = QtWidgets.QDateEdit(
+            QtCore.QDate(
+                start_dt.year,
+                start_dt.month,
+                start_dt.day
+            )
+        )
+        self.end_date_edit = QtWidgets.QDateEdit(
+            QtCore.QDate(
+                end_dt.year,
+                end_dt.month,
+                end_dt.day
+            )
+        )
+
+        self.window_edit = QtWidgets.QLineEdit()
+        self.window_edit.setPlaceholderText("如5,15,30, 导出为CSV文件")
+
+        button = QtWidgets.QPushButton("合成")
+        button.clicked.connect(self.rollup)
+
+        form = QtWidgets.QFormLayout()
+        form.addRow("代码", self.symbol_edit)
+        form.addRow("交易所", self.exchange_combo)
+        form.addRow("开始日期", self.start_date_edit)
+        form.addRow("结束日期", self.end_date_edit)
+        form.addRow("N分钟周期", self.window_edit)
+        form.addRow(button)
+
+        self.setLayout(form)
+
+    def rollup(self):
+        """"""
+        symbol = self.symbol_edit.text()
+        exchange = Exchange(self.exchange_combo.currentData())
+        start = self.start_date_edit.date().toPyDate()
+        end = self.end_date_edit.date().toPyDate()
+
+        try:
+            windows = [
+                int(text) for text in self.window_edit.text().split(",")
+                if text.strip()
+            ]
+        except ValueError:
+            QtWidgets.QMessageBox.warning(self, "合成失败", "N分钟周期格式错误")
+            return
+
+        folder_path = ""
+        if windows:
+            folder_path = QtWidgets.QFileDialog.getExistingDirectory(
+                self, "选择N分钟K线导出目录"
+            )
+            if not folder_path:
+                return
+
+        counts = self.engine.rollup_tick_data(
+            symbol, exchange, start, end, windows, folder_path
+        )
+
+        msg = "\n".join(
+            f"{key.value if isinstance(key, Interval) else f'{key}m'}：{count}条"
+            for key, count in counts.items()
+        )
+        QtWidgets.QMessageBox.information(self, "合成结束", msg)
+
+        self.accept()
@@ -1,9 +1,13 @@
 """"""
 
 import sys
-from threading import Thread
-from queue import Queue, Empty
+from collections import deque
+from enum import Enum
+from threading import Thread, Condition, Lock
+from queue import Empty
 from copy import copy
+from time import perf_counter
+from typing import Dict, Container, List
 
 from vnpy.event import Event, EventEngine
 from vnpy.trader.engine import BaseEngine, MainEngine
@@ -15,34 +19,273 @@ from vnpy.trader.object import (
     ContractData
 )
 from vnpy.trader.event import EVENT_TICK, EVENT_CONTRACT
-from vnpy.trader.utility import load_json, save_json, BarGenerator
+from vnpy.trader.utility import load_json, save_json, get_folder_path, BarGenerator
 from vnpy.trader.database import database_manager
 from vnpy.app.spread_trading.base import EVENT_SPREAD_DATA, SpreadData
 
+from .wal import WriteAheadLog
+
 APP_NAME = "DataRecorder"
 
 EVENT_RECORDER_LOG = "eRecorderLog"
 EVENT_RECORDER_UPDATE = "eRecorderUpdate"
 EVENT_RECORDER_EXCEPTION = "eRecorderException"
 
+
+class QueuePolicy(Enum):
+    """
+    Policy of recorder queue when it is full.
+    """
+
+    BLOCK = "block"                 # wait until queue has space
+    DROP_OLDEST = "drop_oldest"     # drop oldest task of the same symbol
+    CONFLATE = "conflate"           # keep latest tick per interval, then drop oldest
+
+
+class RecorderQueue:
+    """
+    Bounded task queue with load shedding.
+
+    Tasks are kept in deques per (task type, vt_symbol), and a global
+    deque of keys keeps FIFO order between them. When a task is dropped,
+    its key entry is left in order deque and skipped when taken out,
+    and order deque is compacted once stale entries pile up, so memory
+    stays bounded under sustained shedding. Marker tasks (e.g. of WAL)
+    are never dropped.
+    """
+
+    # Compact order deque when it is longer than twice of queue size plus this
+    compact_slack: int = 1024
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        policy: QueuePolicy = QueuePolicy.BLOCK,
+        conflate_interval: float = 0.5,
+        whitelist: Container = ()
+    ):
+        """"""
+        self.maxsize: int = maxsize
+        self.policy: QueuePolicy = policy
+        self.conflate_interval: float = conflate_interval
+        self.whitelist: Container = whitelist
+
+        self.size: int = 0
+        self.order: deque = deque()
+        self.tasks: Dict[tuple, deque] = {}
+
+        self.mutex: Lock = Lock()
+        self.not_empty: Condition = Condition(self.mutex)
+        self.not_full: Condition = Condition(self.mutex)
+
+        self.dropped_count: int = 0
+        self.conflated_count: int = 0
+
+    def qsize(self) -> int:
+        """"""
+        return self.size
+
+    def full(self) -> bool:
+        """"""
+        return bool(self.maxsize) and self.size >= self.maxsize
+
+    def wait_not_full(self) -> None:
+        """
+        Wait until there is space in queue with block policy.
+        """
+        if self.policy is not QueuePolicy.BLOCK:
+            return
+
+        with self.not_full:
+            while self.full():
+                self.not_full.wait()
+
+    def put(self, task: tuple, block: bool = True) -> None:
+        """
+        Put task into queue. With block policy, task is put without
+        waiting if block is False, even if queue is full.
+        """
+        with self.not_full:
+            self._put(task, block)
+
+    def put_many(self, tasks: List[tuple], block: bool = True) -> None:
+        """
+        Put tasks into queue with lock acquired only once.
+        """
+        with self.not_full:
+            for task in tasks:
+                self._put(task, block)
+
+    def _put(self, task: tuple, block: bool) -> None:
+        """
+        Should be called with lock held.
+        """
+        task_type, data = task
+        key = (task_type, getattr(data, "vt_symbol", None))
+
+        if self.conflate(key, task):
+            return
+
+        if self.full():
+            if self.policy is QueuePolicy.BLOCK:
+                while block and self.full():
+                    self.not_full.wait()
+            # Symbol without queued task is still accepted, so queue
+            # size is bounded by maxsize plus number of symbols.
+            elif task_type in {"tick", "bar"} and self.tasks.get(key, None):
+                self.tasks[key].popleft()
+                self.size -= 1
+                self.dropped_count += 1
+
+                if len(self.order) > 2 * self.size + self.compact_slack:
+                    self.compact()
+
+        q = self.tasks.get(key, None)
+        if q is None:
+            q = self.tasks[key] = deque()
+
+        q.append(task)
+        self.order.append(key)
+        self.size += 1
+
+        self.not_empty.notify()
+
+    def compact(self) -> None:
+        """
+        Remove stale entries of dropped tasks from order deque. Should be
+        called with lock held. Oldest tasks of a key are the dropped
+        ones, so the newest entries of each key are kept.
+        """
+        remaining = {key: len(q) for key, q in self.tasks.items()}
+        order = deque()
+
+        for key in reversed(self.order):
+            count = remaining.get(key, 0)
+            if count:
+                remaining[key] = count - 1
+                order.appendleft(key)
+
+        self.order = order
+
+    def conflate(self, key: tuple, task: tuple) -> bool:
+        """
+        Replace the latest queued tick of same symbol if both ticks are
+        in the same conflate interval. Return True if conflated.
+        """
+        task_type, data = task
+
+        if (
+            self.policy is not QueuePolicy.CONFLATE
+            or task_type != "tick"
+            or data.vt_symbol in self.whitelist
+        ):
+            return False
+
+        q = self.tasks.get(key, None)
+        if not q:
+            return False
+
+        last_data = q[-1][1]
+        interval = self.conflate_interval
+        if last_data.datetime.timestamp() // interval != data.datetime.timestamp() // interval:
+            return False
+
+        q[-1] = task
+        self.conflated_count += 1
+        return True
+
+    def get(self, block: bool = True, timeout: float = None) -> tuple:
+        """"""
+        with self.not_empty:
+            if not self.size:
+                if not block:
+                    raise Empty
+
+                self.not_empty.wait(timeout)
+                if not self.size:
+                    raise Empty
+
+            # Skip entries of dropped tasks
+            while True:
+                key = self.order.popleft()
+                q = self.tasks.get(key, None)
+                if q:
+                    break
+
+            task = q.popleft()
+            if not q:
+                self.tasks.pop(key)
+
+            self.size -= 1
+            self.not_full.notify()
+
+            return task
+
+    def get_nowait(self) -> tuple:
+        """"""
+        return self.get(block=False)
+
+
 class RecorderEngine(BaseEngine):
     """"""
     setting_filename = "data_recorder_setting.json"
 
+    # Flush buffered data once batch_size items are collected
+    # or flush_interval seconds have passed, whichever comes first.
+    batch_size = 5000
+    flush_interval = 0.2
+
+    # Seconds between merges of staged ticks into tick table (for
+    # database in staging mode), staged ticks are not loaded until merged.
+    merge_interval = 60
+
+    # Write queued tasks into write-ahead log first, which is replayed
+    # into database on next start if recorder is killed before saving.
+    wal_enabled = False
+    wal_folder = "recorder_wal"
+    wal_segment_size = 64 * 1024 * 1024
+
+    # Bounded queue (0 for unbounded) and its policy when full
+    queue_size = 0
+    queue_policy = QueuePolicy.BLOCK
+    conflate_interval = 0.5
+
     def __init__(self, main_engine: MainEngine, event_engine: EventEngine):
         """"""
         super().__init__(main_engine, event_engine, APP_NAME)
 
-        self.queue = Queue()
+        self.queue = RecorderQueue(
+            self.queue_size,
+            self.queue_policy,
+            self.conflate_interval
+        )
         self.thread = Thread(target=self.run)
         self.active = False
 
+        self.buffers = {"tick": [], "bar": []}
+        self.statistics = {
+            "queue_size": 0,
+            "max_queue_size": 0,
+            "flush_count": 0,
+            "tick_count": 0,
+            "bar_count": 0,
+            "last_flush_latency": 0.0,
+            "max_flush_latency": 0.0,
+        }
+        self.shedding_counts = (0, 0)
+
         self.tick_recordings = {}
         self.bar_recordings = {}
         self.bar_generators = {}
 
+        self.wal = None
+
         self.load_setting()
         self.register_event()
+
+        if self.wal_enabled:
+            self.init_wal()
+
         self.start()
         self.put_event()
 
@@ -62,18 +305,26 @@ class RecorderEngine(BaseEngine):
 
     def run(self):
         """"""
+        next_flush = perf_counter() + self.flush_interval
+        next_merge = perf_counter() + self.merge_interval
+
         while self.active:
             try:
-                task = self.queue.get(timeout=1)
-                task_type, data = task
+                timeout = max(next_flush - perf_counter(), 0)
+                self.drain_queue(timeout)
+
+                if perf_counter() >= next_flush:
+                    self.flush_all()
+                    next_flush = perf_counter() + self.flush_interval
+
+                    self.check_shedding()
 
-                if task_type == "tick":
-                    database_manager.save_tick_data([data])
-                elif task_type == "bar":
-                    database_manager.save_bar_data([data])
+                    if self.wal:
+                        self.sync_wal()
 
-            except Empty:
-                continue
+                if perf_counter() >= next_merge:
+                    database_manager.merge_staging()
+                    next_merge = perf_counter() + self.merge_interval
 
             except Exception:
                 self.active = False
@@ -82,14 +333,184 @@ class RecorderEngine(BaseEngine):
                 info = sys.exc_info()
                 event = Event(EVENT_RECORDER_EXCEPTION, info)
                 self.event_engine.put(event)
+                return
+
+        # Final flush of data left in queue and buffers
+        segment_id = None
+        if self.wal:
+            with self.wal.lock:
+                segment_id = self.wal.rotate()
+
+        self.drain_queue(0)
+        self.flush_all()
+
+        if segment_id is not None:
+            self.wal.remove(segment_id)
+
+    def drain_queue(self, timeout: float):
+        """
+        Wait for the first task until timeout, then move all tasks
+        already waiting in queue into buffers.
+        """
+        try:
+            if timeout:
+                task = self.queue.get(timeout=timeout)
+            else:
+                task = self.queue.get_nowait()
+            self.buffer_task(task)
+
+            while True:
+                task = self.queue.get_nowait()
+                self.buffer_task(task)
+        except Empty:
+            pass
+
+    def buffer_task(self, task: tuple):
+        """
+        Put task data into buffer of its type, flush if buffer is full.
+        """
+        task_type, data = task
+
+        # All tasks of closed WAL segment are buffered before its marker
+        if task_type == "wal":
+            self.flush_all()
+            self.wal.remove(data)
+            return
+
+        buf = self.buffers[task_type]
+        buf.append(data)
+
+        if len(buf) >= self.batch_size:
+            self.flush(task_type)
+
+    def flush(self, task_type: str):
+        """
+        Save all buffered data of task type into database.
+        """
+        buf = self.buffers[task_type]
+        if not buf:
+            return
+        self.buffers[task_type] = []
+
+        start = perf_counter()
+
+        if task_type == "tick":
+            database_manager.save_tick_data(buf)
+        elif task_type == "bar":
+            database_manager.save_bar_data(buf)
+
+        latency = perf_counter() - start
+
+        statistics = self.statistics
+        statistics["flush_count"] += 1
+        statistics[f"{task_type}_count"] += len(buf)
+        statistics["last_flush_latency"] = latency
+        statistics["max_flush_latency"] = max(statistics["max_flush_latency"], latency)
+
+        queue_size = self.queue.qsize()
+        statistics["queue_size"] = queue_size
+        statistics["max_queue_size"] = max(statistics["max_queue_size"], queue_size)
+
+    def flush_all(self):
+        """"""
+        for task_type in list(self.buffers.keys()):
+            self.flush(task_type)
+
+    def init_wal(self):
+        """
+        Replay tasks left in write-ahead log into database, then
+        start logging into new segment.
+        """
+        self.wal = WriteAheadLog(get_folder_path(self.wal_folder))
+
+        segment_ids = self.wal.get_segment_ids()
+        if not segment_ids:
+            return
+
+        count = 0
+        for task in self.wal.replay():
+            self.buffer_task(task)
+            count += 1
+
+        self.flush_all()
+        self.wal.remove(segment_ids[-1])
+
+        self.write_log(f"WAL回放完成，恢复数据{count}条")
+
+    def sync_wal(self):
+        """
+        Fsync all tasks logged since last sync, and rotate segment
+        once it is large enough. The marker task is queued right after
+        the last task of closed segment.
+        """
+        with self.wal.lock:
+            if self.wal.segment_size >= self.wal_segment_size:
+                segment_id = self.wal.rotate()
+                self.queue.put(("wal", segment_id), block=False)
+                return
+
+        self.wal.sync()
+
+    def put_task(self, task: tuple):
+        """
+        Put task into queue, it is written into WAL first if enabled.
+        """
+        if not self.wal:
+            self.queue.put(task)
+            return
+
+        # Do not block writer thread (which syncs WAL with lock held)
+        self.queue.wait_not_full()
+
+        with self.wal.lock:
+            self.wal.write(task)
+            self.queue.put(task, block=False)
+
+    def put_tasks(self, tasks: List[tuple]):
+        """
+        Put a group of tasks into queue, see put_task.
+        """
+        if not self.wal:
+            self.queue.put_many(tasks)
+            return
+
+        self.queue.wait_not_full()
+
+        with self.wal.lock:
+            for task in tasks:
+                self.wal.write(task)
+            self.queue.put_many(tasks, block=False)
+
+    def check_shedding(self):
+        """
+        Publish update event when queue dropped or conflated tasks.
+        """
+        counts = (self.queue.dropped_count, self.queue.conflated_count)
+
+        if counts != self.shedding_counts:
+            self.shedding_counts = counts
+            self.put_event()
+
+    def get_statistics(self) -> dict:
+        """
+        Get queue depth, flush latency and load shedding counters of recorder.
+        """
+        statistics = dict(self.statistics)
+        statistics["queue_size"] = self.queue.qsize()
+        statistics["dropped_count"] = self.queue.dropped_count
+        statistics["conflated_count"] = self.queue.conflated_count
+        return statistics
 
     def close(self):
         """"""
         self.active = False
 
-        if self.thread.isAlive():
+        if self.thread.is_alive():
             self.thread.join()
 
+        # Index staged ticks after recording session ends
+        database_manager.merge_staging()
+
     def start(self):
         """"""
         self.active = True
@@ -177,7 +598,7 @@ class RecorderEngine(BaseEngine):
 
     def register_event(self):
         """"""
-        self.event_engine.register(EVENT_TICK, self.process_tick_event)
+        self.event_engine.register_batch(EVENT_TICK, self.process_tick_events)
         self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
         self.event_engine.register(EVENT_SPREAD_DATA, self.process_spread_event)
 
@@ -190,10 +611,25 @@ class RecorderEngine(BaseEngine):
             bg = self.get_bar_generator(tick.vt_symbol)
             bg.update_tick(tick)
 
-    def process_tick_event(self, event: Event):
-        """"""
-        tick = event.data
-        self.update_tick(tick)
+    def process_tick_events(self, events: List[Event]):
+        """
+        Ticks of whole batch to record are passed to record_ticks at once.
+        """
+        ticks = []
+
+        for event in events:
+            tick = event.data
+            vt_symbol = tick.vt_symbol
+
+            if vt_symbol in self.tick_recordings:
+                ticks.append(tick)
+
+            if vt_symbol in self.bar_recordings:
+                bg = self.get_bar_generator(vt_symbol)
+                bg.update_tick(tick)
+
+        if ticks:
+            self.record_ticks(ticks)
 
     def process_contract_event(self, event: Event):
         """"""
@@ -220,19 +656,27 @@ class RecorderEngine(BaseEngine):
         )
         self.event_engine.put(event)
 
-    def put_event(self):
-        """"""
+    def get_update_data(self) -> dict:
+        """
+        Data of recorder update event, subclass may add its own items.
+        """
         tick_symbols = list(self.tick_recordings.keys())
         tick_symbols.sort()
 
         bar_symbols = list(self.bar_recordings.keys())
         bar_symbols.sort()
 
-        data = {
+        return {
             "tick": tick_symbols,
-            "bar": bar_symbols
+            "bar": bar_symbols,
+            "dropped": self.queue.dropped_count,
+            "conflated": self.queue.conflated_count
         }
 
+    def put_event(self):
+        """"""
+        data = self.get_update_data()
+
         event = Event(
             EVENT_RECORDER_UPDATE,
             data
@@ -240,14 +684,25 @@ class RecorderEngine(BaseEngine):
         self.event_engine.put(event)
 
     def record_tick(self, tick: TickData):
-        """"""
-        task = ("tick", copy(tick))
-        self.queue.put(task)
+        """
+        Tick from gateway is constant once pushed (see BaseGateway),
+        so it is queued by reference without copy.
+        """
+        task = ("tick", tick)
+        self.put_task(task)
+
+    def record_ticks(self, ticks: List[TickData]):
+        """
+        Record a group of ticks, override this together with record_tick
+        to filter or route ticks.
+        """
+        tasks = [("tick", tick) for tick in ticks]
+        self.put_tasks(tasks)
 
     def record_bar(self, bar: BarData):
         """"""
         task = ("bar", copy(bar))
-        self.queue.put(task)
+        self.put_task(task)
 
     def get_bar_generator(self, vt_symbol: str):
         """"""
@@ -0,0 +1,308 @@
+"""
+Sharded tick recording over multiple writer processes.
+
+Ticks are packed into shared memory ring buffers by the recording
+process, and each writer process drains its own ring buffer into
+database with its own database connection.
+"""
+
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+from time import sleep, perf_counter
+from typing import Dict, List, Optional
+from zlib import crc32
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange
+from vnpy.trader.object import TickData
+from vnpy.trader.setting import get_settings
+from vnpy.trader.database.database import (
+    DB_TZ,
+    TICK_FIELDS,
+    TICK_DTYPE,
+    to_db_datetime
+)
+
+
+# Tick record in ring buffer, with symbol and exchange attached
+SHARD_DTYPE = np.dtype(
+    TICK_DTYPE.descr + [("symbol", "S32"), ("exchange", "S16")]
+)
+
+# Header of ring buffer: [head, tail] counters
+HEADER_SIZE = 2 * np.dtype(np.int64).itemsize
+
+
+class TickRingBuffer:
+    """
+    Single-producer/single-consumer ring buffer of tick records in
+    shared memory. The head counter is only written by producer and
+    the tail counter only by consumer.
+    """
+
+    def __init__(self, capacity: int, name: str = None):
+        """
+        Create new shared memory if name not given, otherwise attach
+        to the existing one.
+        """
+        self.capacity: int = capacity
+
+        if name:
+            self.shm = SharedMemory(name=name)
+        else:
+            size = HEADER_SIZE + capacity * SHARD_DTYPE.itemsize
+            self.shm = SharedMemory(create=True, size=size)
+
+        self.header = np.ndarray((2,), dtype=np.int64, buffer=self.shm.buf)
+        self.records = np.ndarray(
+            (capacity,),
+            dtype=SHARD_DTYPE,
+            buffer=self.shm.buf,
+            offset=HEADER_SIZE
+        )
+
+        if not name:
+            self.header[:] = 0
+
+    @property
+    def name(self) -> str:
+        """"""
+        return self.shm.name
+
+    def size(self) -> int:
+        """"""
+        return int(self.header[0] - self.header[1])
+
+    def put(self, tick: TickData) -> bool:
+        """
+        Pack tick into buffer, return False if buffer is full.
+        """
+        head = int(self.header[0])
+        if head - int(self.header[1]) >= self.capacity:
+            return False
+
+        self.records[head % self.capacity] = (
+            (to_db_datetime(tick.datetime), tick.name.encode("utf-8")[:32])
+            + tuple(getattr(tick, name) for name in TICK_FIELDS)
+            + (tick.symbol.encode("utf-8"), tick.exchange.value.encode("utf-8"))
+        )
+
+        # Publish record after it is fully written
+        self.header[0] = head + 1
+        return True
+
+    def get(self, count: int) -> np.ndarray:
+        """
+        Copy out at most count records and release them from buffer.
+        """
+        head = int(self.header[0])
+        tail = int(self.header[1])
+        count = min(count, head - tail)
+
+        start = tail % self.capacity
+        end = start + count
+
+        if end <= self.capacity:
+            records = self.records[start:end].copy()
+        else:
+            records = np.concatenate((
+                self.records[start:],
+                self.records[:end - self.capacity]
+            ))
+
+        self.header[1] = tail + count
+        return records
+
+    def close(self, unlink: bool = False):
+        """"""
+        del self.header
+        del self.records
+
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def to_tick(record: np.void) -> TickData:
+    """
+    Generate TickData object from ring buffer record.
+    """
+    tick = TickData(
+        symbol=record["symbol"].decode("utf-8"),
+        exchange=Exchange(record["exchange"].decode("utf-8")),
+        datetime=DB_TZ.localize(record["datetime"].item()),
+        name=record["name"].decode("utf-8", errors="ignore"),
+        gateway_name="SHARD",
+    )
+
+    for name in TICK_FIELDS:
+        setattr(tick, name, float(record[name]))
+
+    return tick
+
+
+def run_shard_writer(
+    shm_name: str,
+    capacity: int,
+    stop_event,
+    batch_size: int,
+    flush_interval: float
+):
+    """
+    Running in writer process, save ticks from ring buffer into database.
+    """
+    # Every writer process owns its own database connection
+    from vnpy.trader.database.initialize import init
+
+    database_manager = init(get_settings("database."))
+    ring = TickRingBuffer(capacity, name=shm_name)
+    parent = multiprocessing.parent_process()
+
+    next_flush = perf_counter() + flush_interval
+
+    while True:
+        # Exit with data drained if recorder is stopped or killed
+        stopping = stop_event.is_set() or not parent.is_alive()
+
+        if stopping or ring.size() >= batch_size or perf_counter() >= next_flush:
+            while True:
+                records = ring.get(batch_size)
+                if not len(records):
+                    break
+
+                ticks = [to_tick(record) for record in records]
+                database_manager.save_tick_data(ticks)
+
+            next_flush = perf_counter() + flush_interval
+
+            if stopping:
+                break
+        else:
+            sleep(0.01)
+
+    ring.close()
+
+
+class ShardRouter:
+    """
+    Fan out ticks to writer processes, keyed by exchange or by hash
+    of symbol.
+    """
+
+    def __init__(
+        self,
+        shard_count: int,
+        shard_by: str = "exchange",
+        exchanges: List[Exchange] = None,
+        capacity: int = 65536,
+        batch_size: int = 5000,
+        flush_interval: float = 0.2
+    ):
+        """"""
+        self.shard_count: int = shard_count
+        self.shard_by: str = shard_by
+        self.capacity: int = capacity
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+
+        self.exchange_shards = {}
+        if exchanges:
+            for n, exchange in enumerate(exchanges):
+                self.exchange_shards[exchange] = n % shard_count
+
+        # Recording process already runs gateway and event engine threads,
+        # forking it may deadlock on locks held by them.
+        self.context = multiprocessing.get_context("spawn")
+
+        self.rings: List[TickRingBuffer] = []
+        self.processes: List[multiprocessing.Process] = []
+        self.stop_event: Optional[multiprocessing.Event] = None
+
+        self.dropped_count: int = 0
+        self.exited_shards: set = set()
+
+    def start(self):
+        """
+        Create ring buffers and start writer processes.
+        """
+        self.stop_event = self.context.Event()
+
+        for _ in range(self.shard_count):
+            ring = TickRingBuffer(self.capacity)
+            process = self.context.Process(
+                target=run_shard_writer,
+                args=(
+                    ring.name,
+                    self.capacity,
+                    self.stop_event,
+                    self.batch_size,
+                    self.flush_interval
+                ),
+                daemon=True
+            )
+            process.start()
+
+            self.rings.append(ring)
+            self.processes.append(process)
+
+    def get_shard(self, tick: TickData) -> int:
+        """"""
+        if self.shard_by == "exchange" and tick.exchange in self.exchange_shards:
+            return self.exchange_shards[tick.exchange]
+
+        return crc32(tick.symbol.encode("utf-8")) % self.shard_count
+
+    def put(self, tick: TickData):
+        """
+        Put tick into ring buffer of its shard, dropped if buffer is full.
+        """
+        ring = self.rings[self.get_shard(tick)]
+
+        if not ring.put(tick):
+            self.dropped_count += 1
+
+    def check_writers(self) -> List[int]:
+        """
+        Return shards whose writer process exited since last check.
+        """
+        if not self.stop_event or self.stop_event.is_set():
+            return []
+
+        shards = []
+        for n, process in enumerate(self.processes):
+            if n not in self.exited_shards and not process.is_alive():
+                self.exited_shards.add(n)
+                shards.append(n)
+
+        return shards
+
+    def get_statistics(self) -> Dict[str, object]:
+        """
+        Get count of ticks dropped with ring buffer full, and whether
+        writer process of each shard is alive.
+        """
+        return {
+            "shard_dropped_count": self.dropped_count,
+            "shard_alive": [process.is_alive() for process in self.processes],
+            "shard_size": [ring.size() for ring in self.rings],
+        }
+
+    def close(self):
+        """
+        Stop writer processes after ring buffers drained.
+        """
+        if not self.stop_event:
+            return
+
+        self.stop_event.set()
+
+        for process in self.processes:
+            process.join()
+
+        for ring in self.rings:
+            ring.close(unlink=True)
+
+        self.rings.clear()
+        self.processes.clear()
+        self.stop_event = None
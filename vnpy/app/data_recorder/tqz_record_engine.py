@@ -2,9 +2,6 @@ from vnpy.app.data_recorder.engine import RecorderEngine
 from vnpy.trader.engine import MainEngine
 from vnpy.event import Event, EventEngine
 
-from queue import Queue
-from threading import Thread
-
 from vnpy.trader.event import EVENT_TICK, EVENT_CONTRACT
 
 from vnpy.app.data_recorder.tqz_constant import RECORD_MODE, Exchange, Product
@@ -19,28 +16,18 @@ class TQZRecodeEngine(RecorderEngine):
         """"""
         super().__init__(main_engine, event_engine)
 
-        self.queue = Queue()
-        self.thread = Thread(target=self.run)
-        self.active = False
-
         self.strategies = {}
 
         self.record_modes = [RECORD_MODE.TICK_MODE]  # data.json content.
 
         self.register_event()
-        self.start()
 
 
     def register_event(self):
         """"""
-        self.event_engine.register(EVENT_TICK, self.process_tick_event)
+        self.event_engine.register_batch(EVENT_TICK, self.process_tick_events)
         self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
 
-    def process_tick_event(self, event: Event):
-        """"""
-        tick = event.data
-        self.update_tick(tick)
-
     def process_contract_event(self, event: Event):
         """"""
         contract = event.data
@@ -0,0 +1,130 @@
+"""
+Write-ahead log of recorder tasks.
+"""
+
+import os
+import pickle
+from pathlib import Path
+from struct import Struct
+from threading import Lock
+from typing import Iterator, List, Optional
+
+
+# Each record is a length header followed by pickled task
+HEADER = Struct("<I")
+
+
+class WriteAheadLog:
+    """
+    Append-only log of recorder tasks, split into numbered segment
+    files. Tasks are written with buffered sequential io, and the
+    recorder thread calls sync to fsync a whole group of them at once.
+    Segments are removed after all their tasks are saved into database.
+    """
+
+    def __init__(self, folder: Path, buffer_size: int = 1024 * 1024):
+        """"""
+        self.folder: Path = folder
+        self.buffer_size: int = buffer_size
+        self.lock: Lock = Lock()
+
+        segment_ids = self.get_segment_ids()
+        self.segment_id: int = segment_ids[-1] + 1 if segment_ids else 0
+        self.segment_size: int = 0
+        self.file = None
+
+    def get_segment_path(self, segment_id: int) -> Path:
+        """"""
+        return self.folder.joinpath(f"{segment_id:010d}.wal")
+
+    def get_segment_ids(self) -> List[int]:
+        """"""
+        return sorted(int(path.stem) for path in self.folder.glob("*.wal"))
+
+    def open(self) -> None:
+        """
+        Open new segment file for writing.
+        """
+        path = self.get_segment_path(self.segment_id)
+        self.file = open(path, "ab", buffering=self.buffer_size)
+        self.segment_size = 0
+
+    def write(self, task: tuple) -> None:
+        """
+        Append task into current segment, should be called with lock held.
+        """
+        if not self.file:
+            self.open()
+
+        data = pickle.dumps(task, protocol=pickle.HIGHEST_PROTOCOL)
+        self.file.write(HEADER.pack(len(data)))
+        self.file.write(data)
+        self.segment_size += HEADER.size + len(data)
+
+    def sync(self) -> None:
+        """
+        Flush buffered records and fsync current segment.
+        """
+        with self.lock:
+            if not self.file:
+                return
+            self.file.flush()
+            fileno = self.file.fileno()
+
+        os.fsync(fileno)
+
+    def rotate(self) -> Optional[int]:
+        """
+        Close current segment, later tasks are written into a new one.
+        Should be called with lock held. Return id of closed segment.
+        """
+        if not self.file:
+            return None
+
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        self.file = None
+
+        segment_id = self.segment_id
+        self.segment_id += 1
+        return segment_id
+
+    def remove(self, last_id: int) -> None:
+        """
+        Remove all segments with id not greater than last_id.
+        """
+        for segment_id in self.get_segment_ids():
+            if segment_id <= last_id:
+                self.get_segment_path(segment_id).unlink()
+
+    def replay(self) -> Iterator[tuple]:
+        """
+        Read tasks from all closed segments left on disk. Incomplete
+        record at the end of segment (from crash) is ignored.
+        """
+        for segment_id in self.get_segment_ids():
+            if self.file and segment_id >= self.segment_id:
+                break
+
+            path = self.get_segment_path(segment_id)
+            with open(path, "rb") as f:
+                while True:
+                    header = f.read(HEADER.size)
+                    if len(header) < HEADER.size:
+                        break
+
+                    size = HEADER.unpack(header)[0]
+                    data = f.read(size)
+                    if len(data) < size:
+                        break
+
+                    try:
+                        yield pickle.loads(data)
+                    except Exception:
+                        break
+
+    def close(self) -> None:
+        """"""
+        with self.lock:
+            self.rotate()
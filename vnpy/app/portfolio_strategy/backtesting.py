@@ -1,7 +1,6 @@
 from collections import defaultdict
 from datetime import date, datetime, timedelta
 from typing import Dict, List, Set, Tuple
-from functools import lru_cache
 from copy import copy
 import traceback
 
@@ -11,7 +10,7 @@ from plotly.subplots import make_subplots
 from pandas import DataFrame
 
 from vnpy.trader.constant import Direction, Offset, Interval, Status
-from vnpy.trader.database import database_manager
+from vnpy.trader.database.cache import range_cache
 from vnpy.trader.object import OrderData, TradeData, BarData
 from vnpy.trader.utility import round_to, extract_vt_symbol
 
@@ -833,7 +832,6 @@ class PortfolioDailyResult:
                 contract_result.update_close_price(close_price)
 
 
-@lru_cache(maxsize=999)
 def load_bar_data(
     vt_symbol: str,
     interval: Interval,
@@ -843,6 +841,6 @@ def load_bar_data(
     """"""
     symbol, exchange = extract_vt_symbol(vt_symbol)
 
-    return database_manager.load_bar_data(
+    return range_cache.load_bar_data(
         symbol, exchange, interval, start, end
     )
@@ -1,14 +1,13 @@
 from typing import Dict, List
 from datetime import datetime
 from enum import Enum
-from functools import lru_cache
 
 from vnpy.trader.object import (
     TickData, PositionData, TradeData, ContractData, BarData
 )
 from vnpy.trader.constant import Direction, Offset, Exchange, Interval
 from vnpy.trader.utility import floor_to, ceil_to, round_to, extract_vt_symbol
-from vnpy.trader.database import database_manager
+from vnpy.trader.database.cache import range_cache
 
 
 EVENT_SPREAD_DATA = "eSpreadData"
@@ -371,7 +370,6 @@ class BacktestingMode(Enum):
     TICK = 2
 
 
-@lru_cache(maxsize=999)
 def load_bar_data(
     spread: SpreadData,
     interval: Interval,
@@ -386,7 +384,7 @@ def load_bar_data(
     for vt_symbol in spread.legs.keys():
         symbol, exchange = extract_vt_symbol(vt_symbol)
 
-        bar_data: List[BarData] = database_manager.load_bar_data(
+        bar_data: List[BarData] = range_cache.load_bar_data(
             symbol, exchange, interval, start, end
         )
 
@@ -432,13 +430,12 @@ def load_bar_data(
     return spread_bars
 
 
-@lru_cache(maxsize=999)
 def load_tick_data(
     spread: SpreadData,
     start: datetime,
     end: datetime
 ):
     """"""
-    return database_manager.load_tick_data(
+    return range_cache.load_tick_data(
         spread.name, Exchange.LOCAL, start, end
     )
@@ -1 +1 @@
-from .engine import Event, EventEngine, EVENT_TIMER
+from .engine import Event, EventEngine, EVENT_TIMER, EVENT_TIMER_JOB, EVENT_METRICS
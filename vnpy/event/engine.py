@@ -3,13 +3,62 @@ Event-driven framework of vn.py framework.
 """
 
 from collections import defaultdict
-from queue import Empty, Queue
-from threading import Thread
-from time import sleep
-from typing import Any, Callable, List
+from heapq import heappush, heappop
+from itertools import count
+from queue import Empty, Queue, PriorityQueue, SimpleQueue
+from threading import Thread, Condition
+from time import monotonic, perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .metrics import EventMetrics
 
 EVENT_TIMER = "eTimer"
 
+# Event of timer callback added by add_timer, processed by engine only
+EVENT_TIMER_JOB = "eTimerJob"
+
+# Event of metrics snapshot, put periodically in metrics mode
+EVENT_METRICS = "eMetrics"
+
+# Lanes of event engine in lane mode, each with own queue and thread
+LANE_DEFAULT = "default"
+LANE_MARKET = "market"
+LANE_TRADING = "trading"
+LANE_HOUSEKEEPING = "housekeeping"
+
+# Event type prefixes routed to lanes, other types go to housekeeping
+# lane (log, timer, contract, app events and UI updates). Prefixes of
+# routes must not extend past the first dot of type (see get_route_key).
+LANE_ROUTES: Dict[str, str] = {
+    "eTick.": LANE_MARKET,
+    "eOrder.": LANE_TRADING,
+    "eTrade.": LANE_TRADING,
+    "ePosition.": LANE_TRADING,
+    "eAccount.": LANE_TRADING,
+}
+
+# Priority of event types in priority mode, smaller one is processed first
+# (prefixes follow the same rule as LANE_ROUTES)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+PRIORITY_ROUTES: Dict[str, int] = {
+    "eOrder.": PRIORITY_HIGH,
+    "eTrade.": PRIORITY_HIGH,
+    "eTimer": PRIORITY_HIGH,        # also EVENT_TIMER_JOB
+    "eLog": PRIORITY_LOW,
+}
+
+# Event types routed by topic in topic mode, with attribute of event
+# data used as topic. Handlers registered to type plus topic (e.g.
+# "eTick." + vt_symbol) are called with event of the type, so that
+# no duplicate event is put for each topic.
+TOPIC_ROUTES: Dict[str, str] = {
+    "eTick.": "vt_symbol",
+}
+
+
 class Event:
     """
     Event object consists of a type string which is used
@@ -26,6 +75,152 @@ class Event:
 # Defines handler function to be used in event engine.
 HandlerType = Callable[[Event], None]
 
+# Defines batch handler function, called with list of events of same type.
+BatchHandlerType = Callable[[List[Event]], None]
+
+
+def match_route(type: str, routes: Dict[str, Any], default: Any) -> Any:
+    """
+    Find value of the longest prefix in routes matching event type.
+    """
+    result = default
+    length = -1
+
+    for prefix, value in routes.items():
+        if type.startswith(prefix) and len(prefix) > length:
+            result = value
+            length = len(prefix)
+
+    return result
+
+
+def get_route_key(type: str) -> str:
+    """
+    Get part of event type up to the first dot (e.g. "eOrder." of
+    "eOrder.<vt_orderid>"). Routes are matched on this key, so that
+    results are cached for a bounded set of keys instead of each type.
+    """
+    index = type.find(".")
+    if index < 0:
+        return type
+    return type[:index + 1]
+
+
+class EventLane:
+    """
+    Event queue with its own dispatch thread. Events of a lane are
+    processed in FIFO order, or by priority first in priority mode
+    (FIFO among events of same priority).
+
+    With batch_size above 1, all events available in queue (up to
+    batch_size) are taken out at each wakeup and processed as a batch.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        engine: "EventEngine",
+        priority: bool = False,
+        batch_size: int = 1
+    ):
+        """"""
+        self.name: str = name
+        self.engine: "EventEngine" = engine
+        self.priority: bool = priority
+        self.batch_size: int = batch_size
+
+        if priority:
+            self.queue: Queue = PriorityQueue()
+            self.counter = count()
+        elif batch_size > 1:
+            self.queue: SimpleQueue = SimpleQueue()
+        else:
+            self.queue: Queue = Queue()
+
+        self.thread: Thread = Thread(target=self.run, name=f"EventLane-{name}")
+
+    def put(self, event: Event) -> None:
+        """"""
+        if self.priority:
+            priority = self.engine.get_priority(event.type)
+            self.queue.put((priority, next(self.counter), event))
+        else:
+            self.queue.put(event)
+
+    def run(self) -> None:
+        """
+        Get event from queue and then process it.
+        """
+        if self.batch_size > 1:
+            self.run_batch()
+            return
+
+        engine = self.engine
+        process = engine._process_measured if engine._metrics else engine._process
+
+        while engine._active:
+            try:
+                item = self.queue.get(block=True, timeout=1)
+            except Empty:
+                continue
+
+            if self.priority:
+                item = item[2]
+            process(item)
+
+    def run_batch(self) -> None:
+        """
+        Wait for first event, then drain queue without blocking.
+        """
+        engine = self.engine
+        get = self.queue.get
+        get_nowait = self.queue.get_nowait
+        batch_size = self.batch_size
+
+        if engine._metrics:
+            process_batch = engine._process_batch_measured
+        else:
+            process_batch = engine._process_batch
+
+        while engine._active:
+            try:
+                items = [get(block=True, timeout=1)]
+            except Empty:
+                continue
+
+            try:
+                while len(items) < batch_size:
+                    items.append(get_nowait())
+            except Empty:
+                pass
+
+            if self.priority:
+                items = [item[2] for item in items]
+            process_batch(items)
+
+
+class TimerJob:
+    """
+    Callback scheduled by event engine on monotonic time.
+    """
+
+    def __init__(
+        self,
+        timer_id: int,
+        interval: float,
+        callback: Optional[Callable[[], None]],
+        repeat: bool
+    ):
+        """"""
+        self.timer_id: int = timer_id
+        self.interval: float = interval
+        self.callback: Optional[Callable[[], None]] = callback
+        self.repeat: bool = repeat
+
+        self.deadline: float = monotonic() + interval
+        self.pending: bool = False
+        self.cancelled: bool = False
+
 
 class EventEngine:
     """
@@ -33,32 +228,179 @@ class EventEngine:
     to those handlers registered.
 
     It also generates timer event by every interval seconds,
-    which can be used for timing purpose.
+    which can be used for timing purpose. Timer event and callbacks
+    added by add_timer are scheduled on monotonic time, so they do not
+    drift with time spent in handlers.
+
+    By default all events are processed by one thread in FIFO order.
+    In lane mode, market data, trading and housekeeping events are
+    processed by separate lanes (see LANE_ROUTES), so a slow log or UI
+    handler won't delay ticks and orders. Handlers registered to types
+    of different lanes may then be called concurrently from different
+    threads. In priority mode, order and trade events overtake other
+    events waiting in the same queue (see PRIORITY_ROUTES).
+
+    With batch_size above 1, each lane drains up to batch_size events
+    at once. Handlers registered by register_batch are called once per
+    batch with all events of their type, in both modes.
+
+    In topic mode (default), handlers registered to a type in
+    TOPIC_ROUTES plus topic are indexed by topic, and called for events
+    of the type whose data has the topic. With topic mode disabled,
+    such registrations are plain types and no topic lookup is done.
+
+    In metrics mode, latency from put to dispatch of each event type,
+    time used by each handler and depth of queues are measured, and
+    published as EVENT_METRICS event (see EventMetrics). Nothing is
+    measured if disabled.
     """
 
-    def __init__(self, interval: int = 1):
+    def __init__(
+        self,
+        interval: int = 1,
+        lanes: bool = False,
+        priority: bool = False,
+        batch_size: int = 1,
+        topics: bool = True,
+        metrics: bool = False
+    ):
         """
         Timer event is generated every 1 second by default, if
         interval not specified.
         """
         self._interval: int = interval
-        self._queue: Queue = Queue()
         self._active: bool = False
-        self._thread: Thread = Thread(target=self._run)
         self._timer: Thread = Thread(target=self._run_timer)
+        self._timer_condition: Condition = Condition()
+        self._timer_heap: List[Tuple[float, int, TimerJob]] = []
+        self._timer_jobs: Dict[int, TimerJob] = {}
+        self._timer_count = count(1)
         self._handlers: defaultdict = defaultdict(list)
         self._general_handlers: List = []
+        self._batch_handlers: defaultdict = defaultdict(list)
+
+        # Handlers to call for each type, rebuilt after (un)register
+        self._handler_cache: Dict[Optional[str], Tuple[HandlerType, ...]] = {}
+
+        # Handlers of each topic, indexed by type and then topic
+        self._topics: bool = topics
+        self._topic_handlers: Dict[str, Dict[str, Tuple[HandlerType, ...]]] = {}
+
+        if lanes:
+            lane_names = [LANE_MARKET, LANE_TRADING, LANE_HOUSEKEEPING]
+            self._default_lane: str = LANE_HOUSEKEEPING
+        else:
+            lane_names = [LANE_DEFAULT]
+            self._default_lane: str = LANE_DEFAULT
+
+        self._lanes: Dict[str, EventLane] = {
+            name: EventLane(name, self, priority, batch_size) for name in lane_names
+        }
+        self._type_lanes: Dict[str, EventLane] = {}
+        self._type_priorities: Dict[str, int] = {}
+
+        # Routing is skipped if there is only one lane
+        if len(self._lanes) == 1:
+            self._single_lane: Optional[EventLane] = self._lanes[self._default_lane]
+        else:
+            self._single_lane: Optional[EventLane] = None
 
-    def _run(self) -> None:
+        self._metrics: Optional[EventMetrics] = EventMetrics() if metrics else None
+
+    def get_lane(self, type: str) -> EventLane:
         """
-        Get event from queue and then process it.
+        Get lane processing the event type, cached for each route key.
         """
-        while self._active:
-            try:
-                event = self._queue.get(block=True, timeout=1)
-                self._process(event)
-            except Empty:
-                pass
+        if self._single_lane:
+            return self._single_lane
+
+        key = get_route_key(type)
+        lane = self._type_lanes.get(key, None)
+
+        if not lane:
+            name = match_route(key, LANE_ROUTES, self._default_lane)
+            lane = self._lanes.get(name, self._lanes[self._default_lane])
+            self._type_lanes[key] = lane
+
+        return lane
+
+    def get_priority(self, type: str) -> int:
+        """
+        Get priority of the event type, cached for each route key.
+        Only called by lanes in priority mode.
+        """
+        key = get_route_key(type)
+        priority = self._type_priorities.get(key, None)
+
+        if priority is None:
+            priority = match_route(key, PRIORITY_ROUTES, PRIORITY_NORMAL)
+            self._type_priorities[key] = priority
+
+        return priority
+
+    def get_handlers(self, type: str) -> Tuple[HandlerType, ...]:
+        """
+        Get handlers listening to the type, followed by general handlers.
+        Only types with handlers registered are cached, other types (e.g.
+        eOrder.<vt_orderid>) share the tuple of general handlers cached
+        with key None.
+        """
+        cache = self._handler_cache
+        handlers = cache.get(type, None)
+
+        if handlers is None:
+            if type == EVENT_TIMER_JOB:
+                handlers = (self._process_timer_job,)
+                cache[type] = handlers
+            elif type in self._handlers:
+                handlers = tuple(self._handlers[type]) + tuple(self._general_handlers)
+                cache[type] = handlers
+            else:
+                handlers = cache.get(None, None)
+                if handlers is None:
+                    handlers = tuple(self._general_handlers)
+                    cache[None] = handlers
+
+        return handlers
+
+    def _clear_handler_cache(self) -> None:
+        """
+        Replace the cache instead of clearing it, so that tuple built by
+        dispatch thread from old handlers is not saved into new cache.
+        """
+        self._handler_cache = {}
+
+    def split_topic(self, type: str) -> Optional[Tuple[str, str]]:
+        """
+        Split type registered by handler into type and topic, return
+        None if it is not topic of any type in topic mode.
+        """
+        if not self._topics:
+            return None
+
+        for prefix in TOPIC_ROUTES:
+            if type.startswith(prefix) and len(type) > len(prefix):
+                return prefix, type[len(prefix):]
+
+        return None
+
+    def get_topic_handlers(self, event: Event) -> Tuple[HandlerType, ...]:
+        """
+        Get handlers of topic of the event.
+        """
+        topics = self._topic_handlers.get(event.type, None)
+        if not topics:
+            return ()
+
+        topic = getattr(event.data, TOPIC_ROUTES[event.type], None)
+        return topics.get(topic, ())
+
+    def _process_topic(self, event: Event) -> None:
+        """
+        Distribute event to handlers of its topic.
+        """
+        for handler in self.get_topic_handlers(event):
+            handler(event)
 
     def _process(self, event: Event) -> None:
         """
@@ -68,28 +410,216 @@ class EventEngine:
         Then distrubute event to those general handlers which listens
         to all types.
         """
+        for handler in self.get_handlers(event.type):
+            handler(event)
+
+        if self._topic_handlers:
+            self._process_topic(event)
+
+        if self._batch_handlers:
+            batch_handlers = self._batch_handlers.get(event.type, None)
+            if batch_handlers:
+                for handler in tuple(batch_handlers):
+                    handler([event])
+
+    def _process_batch(self, events: List[Event]) -> None:
+        """
+        Distribute each event to handlers in order, then distribute
+        events grouped by type to batch handlers.
+        """
+        get_handlers = self.get_handlers
+        topic_handlers = self._topic_handlers
+
+        for event in events:
+            for handler in get_handlers(event.type):
+                handler(event)
+
+            if topic_handlers:
+                self._process_topic(event)
+
+        if not self._batch_handlers:
+            return
+
+        groups: Dict[str, List[Event]] = defaultdict(list)
+        for event in events:
+            if event.type in self._batch_handlers:
+                groups[event.type].append(event)
+
+        for type, group in groups.items():
+            for handler in tuple(self._batch_handlers.get(type, ())):
+                handler(group)
+
+    def _call_measured(
+        self,
+        handlers: Tuple[Callable, ...],
+        data: Any,
+        durations: List[Tuple[Callable, float]]
+    ) -> None:
+        """
+        Call handlers with data, and append time used by each of them.
+        """
+        for handler in handlers:
+            start = perf_counter()
+            handler(data)
+            durations.append((handler, perf_counter() - start))
+
+    def _process_measured(self, event: Event) -> None:
+        """
+        Same as _process, with latency and handler time measured.
+        """
+        latency = perf_counter() - event.put_time
+        durations = []
+
+        self._call_measured(self.get_handlers(event.type), event, durations)
+
+        if self._topic_handlers:
+            self._call_measured(self.get_topic_handlers(event), event, durations)
+
+        if self._batch_handlers:
+            batch_handlers = tuple(self._batch_handlers.get(event.type, ()))
+            self._call_measured(batch_handlers, [event], durations)
+
+        self._metrics.record_event(get_route_key(event.type), latency, durations)
+
+    def _process_batch_measured(self, events: List[Event]) -> None:
+        """
+        Same as _process_batch, with latency and handler time measured.
+        """
+        metrics = self._metrics
 
-        if event.type in self._handlers:
-            [handler(event) for handler in self._handlers[event.type]]
+        for event in events:
+            latency = perf_counter() - event.put_time
+            durations = []
 
-        if self._general_handlers:
-            [handler(event) for handler in self._general_handlers]
+            self._call_measured(self.get_handlers(event.type), event, durations)
+
+            if self._topic_handlers:
+                self._call_measured(self.get_topic_handlers(event), event, durations)
+
+            metrics.record_event(get_route_key(event.type), latency, durations)
+
+        if not self._batch_handlers:
+            return
+
+        groups: Dict[str, List[Event]] = defaultdict(list)
+        for event in events:
+            if event.type in self._batch_handlers:
+                groups[event.type].append(event)
+
+        durations = []
+        for type, group in groups.items():
+            batch_handlers = tuple(self._batch_handlers.get(type, ()))
+            self._call_measured(batch_handlers, group, durations)
+
+        metrics.record_handlers(durations)
+
+    def _publish_metrics(self) -> None:
+        """
+        Sample depth of queues, then put snapshot of metrics as event.
+        """
+        depths = {name: lane.queue.qsize() for name, lane in self._lanes.items()}
+        self._metrics.sample(depths)
+
+        event = Event(EVENT_METRICS, self._metrics.get_snapshot())
+        self.put(event)
+
+    def get_metrics(self) -> Optional[Dict[str, Any]]:
+        """
+        Get snapshot of metrics, None if metrics mode is disabled.
+        """
+        if not self._metrics:
+            return None
+        return self._metrics.get_snapshot()
 
     def _run_timer(self) -> None:
         """
-        Sleep by interval second(s) and then generate a timer event.
+        Wait until deadline of the earliest timer job, then put its
+        event and schedule next run of repeating job.
         """
+        heap = self._timer_heap
+
         while self._active:
-            sleep(self._interval)
-            event = Event(EVENT_TIMER)
-            self.put(event)
+            with self._timer_condition:
+                now = monotonic()
+
+                if not heap or heap[0][0] > now:
+                    timeout = heap[0][0] - now if heap else 1
+                    self._timer_condition.wait(min(timeout, 1))
+                    continue
+
+                _, _, job = heappop(heap)
+                if job.cancelled:
+                    continue
+
+                # Runs missed when engine was busy are skipped
+                if job.repeat:
+                    job.deadline += job.interval
+                    if job.deadline <= now:
+                        missed = (now - job.deadline) // job.interval + 1
+                        job.deadline += missed * job.interval
+                    heappush(heap, (job.deadline, job.timer_id, job))
+                else:
+                    self._timer_jobs.pop(job.timer_id, None)
+
+                # Callback still waiting in queue is not put again
+                if job.pending:
+                    continue
+                job.pending = job.callback is not None
+
+            if job.callback:
+                self.put(Event(EVENT_TIMER_JOB, job))
+            else:
+                self.put(Event(EVENT_TIMER))
+
+    def _process_timer_job(self, event: Event) -> None:
+        """"""
+        job: TimerJob = event.data
+        job.pending = False
+
+        if not job.cancelled:
+            job.callback()
+
+    def add_timer(
+        self,
+        interval: float,
+        callback: Callable[[], None],
+        repeat: bool = True
+    ) -> int:
+        """
+        Call callback every interval seconds, or only once after interval
+        seconds if repeat is False. Callback is called in the thread
+        processing timer events, and before events of lower priority in
+        priority mode. Return id of the timer.
+        """
+        job = TimerJob(next(self._timer_count), interval, callback, repeat)
+
+        with self._timer_condition:
+            self._timer_jobs[job.timer_id] = job
+            heappush(self._timer_heap, (job.deadline, job.timer_id, job))
+            self._timer_condition.notify()
+
+        return job.timer_id
+
+    def remove_timer(self, timer_id: int) -> None:
+        """
+        Cancel timer added by add_timer.
+        """
+        with self._timer_condition:
+            job = self._timer_jobs.pop(timer_id, None)
+            if job:
+                job.cancelled = True
 
     def start(self) -> None:
         """
         Start event engine to process events and generate timer events.
         """
         self._active = True
-        self._thread.start()
+        for lane in self._lanes.values():
+            lane.thread.start()
+
+        self.add_timer(self._interval, None)
+        if self._metrics:
+            self.add_timer(self._metrics.interval, self._publish_metrics)
         self._timer.start()
 
     def stop(self) -> None:
@@ -97,32 +627,49 @@ class EventEngine:
         Stop event engine.
         """
         self._active = False
+        with self._timer_condition:
+            self._timer_condition.notify()
         self._timer.join()
-        self._thread.join()
+        for lane in self._lanes.values():
+            lane.thread.join()
 
     def put(self, event: Event) -> None:
         """
         Put an event object into event queue.
         """
-        self._queue.put(event)
+        if self._metrics:
+            event.put_time = perf_counter()
+        self.get_lane(event.type).put(event)
 
     def register(self, type: str, handler: HandlerType) -> None:
         """
         Register a new handler function for a specific event type. Every
         function can only be registered once for each event type.
         """
+        result = self.split_topic(type)
+        if result:
+            self.register_topic(result[0], result[1], handler)
+            return
+
         handler_list = self._handlers[type]
         if handler not in handler_list:
             handler_list.append(handler)
+            self._clear_handler_cache()
 
     def unregister(self, type: str, handler: HandlerType) -> None:
         """
         Unregister an existing handler function from event engine.
         """
+        result = self.split_topic(type)
+        if result:
+            self.unregister_topic(result[0], result[1], handler)
+            return
+
         handler_list = self._handlers[type]
 
         if handler in handler_list:
             handler_list.remove(handler)
+            self._clear_handler_cache()
 
         if not handler_list:
             self._handlers.pop(type)
@@ -134,6 +681,7 @@ class EventEngine:
         """
         if handler not in self._general_handlers:
             self._general_handlers.append(handler)
+            self._clear_handler_cache()
 
     def unregister_general(self, handler: HandlerType) -> None:
         """
@@ -141,3 +689,55 @@ class EventEngine:
         """
         if handler in self._general_handlers:
             self._general_handlers.remove(handler)
+            self._clear_handler_cache()
+
+    def register_batch(self, type: str, handler: BatchHandlerType) -> None:
+        """
+        Register a handler function called with list of events of the
+        type, all events of a batch at once in batch mode, otherwise
+        one event each call.
+        """
+        handler_list = self._batch_handlers[type]
+        if handler not in handler_list:
+            handler_list.append(handler)
+
+    def unregister_batch(self, type: str, handler: BatchHandlerType) -> None:
+        """
+        Unregister an existing batch handler function.
+        """
+        handler_list = self._batch_handlers[type]
+
+        if handler in handler_list:
+            handler_list.remove(handler)
+
+        if not handler_list:
+            self._batch_handlers.pop(type)
+
+    def register_topic(self, type: str, topic: str, handler: HandlerType) -> None:
+        """
+        Register a handler function for events of the type with topic,
+        e.g. ticks of one vt_symbol.
+        """
+        topics = self._topic_handlers.setdefault(type, {})
+        handlers = topics.get(topic, ())
+
+        if handler not in handlers:
+            topics[topic] = handlers + (handler,)
+
+    def unregister_topic(self, type: str, topic: str, handler: HandlerType) -> None:
+        """
+        Unregister an existing topic handler function.
+        """
+        topics = self._topic_handlers.get(type, {})
+        handlers = topics.get(topic, ())
+
+        if handler in handlers:
+            handlers = tuple(h for h in handlers if h != handler)
+
+            if handlers:
+                topics[topic] = handlers
+            else:
+                topics.pop(topic)
+
+        if not topics:
+            self._topic_handlers.pop(type, None)
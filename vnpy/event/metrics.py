@@ -0,0 +1,170 @@
+"""
+Latency and throughput metrics of event engine.
+"""
+
+from collections import defaultdict, deque
+from datetime import datetime
+from math import log2
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Deque, Dict, List, Tuple
+
+# Width of histogram bucket is 2 ** (1 / BUCKET_STEPS) times of previous
+# one, so percentiles are accurate within about 19%.
+BUCKET_STEPS = 4
+
+
+class Histogram:
+    """
+    Log-bucketed histogram of durations in seconds.
+    """
+
+    def __init__(self):
+        """"""
+        self.count: int = 0
+        self.total: float = 0
+        self.max: float = 0
+        self.buckets: Dict[int, int] = defaultdict(int)
+
+    def add(self, value: float) -> None:
+        """"""
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+        # Bucket 0 for durations below 1 microsecond
+        microseconds = value * 1000000
+        if microseconds < 1:
+            index = 0
+        else:
+            index = int(log2(microseconds) * BUCKET_STEPS) + 1
+        self.buckets[index] += 1
+
+    def get_percentile(self, percent: float) -> float:
+        """
+        Get upper bound of bucket containing the percentile.
+        """
+        target = self.count * percent / 100
+        seen = 0
+
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                value = 2 ** (index / BUCKET_STEPS) / 1000000
+                return min(value, self.max)
+
+        return self.max
+
+    def get_summary(self) -> Dict[str, float]:
+        """"""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0,
+            "p50": self.get_percentile(50),
+            "p99": self.get_percentile(99),
+            "max": self.max,
+        }
+
+
+class EventMetrics:
+    """
+    Collects enqueue-to-dispatch latency and count of each event type,
+    execution time of each handler, and queue depth sampled every
+    interval seconds. Histograms are cumulative since engine started.
+
+    Latency is keyed by route key of event type (e.g. "eOrder." for
+    all orders), so per-id types do not add a histogram each.
+    """
+
+    # Seconds between samples of queue depth and EVENT_METRICS events
+    interval: float = 1
+
+    # Number of samples kept in history
+    history_size: int = 300
+
+    def __init__(self):
+        """"""
+        self.lock: Lock = Lock()
+
+        self.latencies: Dict[str, Histogram] = defaultdict(Histogram)
+        self.durations: Dict[str, Histogram] = defaultdict(Histogram)
+        self.names: Dict[Callable, str] = {}
+
+        # Samples of (datetime, perf_counter, total count, queue depths)
+        self.history: Deque[Tuple[datetime, float, int, Dict[str, int]]] = deque(
+            maxlen=self.history_size
+        )
+        self.count: int = 0
+
+    def get_name(self, handler: Callable) -> str:
+        """"""
+        name = self.names.get(handler, None)
+
+        if not name:
+            name = getattr(handler, "__qualname__", None) or repr(handler)
+            self.names[handler] = name
+
+        return name
+
+    def record_event(
+        self,
+        type: str,
+        latency: float,
+        durations: List[Tuple[Callable, float]]
+    ) -> None:
+        """
+        Record latency of one dispatched event and time used by handlers.
+        """
+        with self.lock:
+            self.count += 1
+            self.latencies[type].add(latency)
+
+            for handler, duration in durations:
+                self.durations[self.get_name(handler)].add(duration)
+
+    def record_handlers(self, durations: List[Tuple[Callable, float]]) -> None:
+        """
+        Record time used by batch handlers.
+        """
+        with self.lock:
+            for handler, duration in durations:
+                self.durations[self.get_name(handler)].add(duration)
+
+    def sample(self, depths: Dict[str, int]) -> None:
+        """
+        Record queue depth of each lane and total count of events.
+        """
+        with self.lock:
+            self.history.append((datetime.now(), perf_counter(), self.count, depths))
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """
+        Get summary of all metrics. Rate is events per second between
+        last two samples.
+        """
+        with self.lock:
+            history = list(self.history)
+
+            rate = 0
+            if len(history) >= 2:
+                _, last_time, last_count, _ = history[-2]
+                _, time, count, _ = history[-1]
+                if time > last_time:
+                    rate = (count - last_count) / (time - last_time)
+
+            return {
+                "datetime": datetime.now(),
+                "count": self.count,
+                "rate": rate,
+                "latency": {
+                    type: histogram.get_summary()
+                    for type, histogram in self.latencies.items()
+                },
+                "handler": {
+                    name: histogram.get_summary()
+                    for name, histogram in self.durations.items()
+                },
+                "queue": history[-1][3] if history else {},
+                "queue_history": [(dt, depths) for dt, _, _, depths in history],
+            }
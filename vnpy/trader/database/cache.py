@@ -0,0 +1,405 @@
+"""
+Read-through range cache of bar/tick data in front of database_manager.
+
+Data is cached as numpy structured arrays (BAR_DTYPE/TICK_DTYPE), one
+chunk per symbol and natural day in database timezone. Any [start, end]
+range is served by stitching the cached day chunks, and only missing
+days are loaded from database. Chunks are evicted in LRU order when
+total size exceeds the byte budget.
+
+Optionally, chunks of ended days are also persisted as .npy files in a
+local cache folder, and opened read-only with memory mapping. Processes
+loading same history (e.g. optimization workers) then share the page
+cache of these files instead of querying database again.
+"""
+
+import os
+import shutil
+from collections import OrderedDict
+from datetime import datetime, date, time, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData, TickData
+from vnpy.trader.setting import SETTINGS
+from vnpy.trader.utility import get_folder_path
+
+from .database import (
+    BaseDatabaseManager,
+    DB_TZ,
+    BAR_FIELDS,
+    TICK_FIELDS,
+    BAR_DTYPE,
+    TICK_DTYPE,
+)
+
+
+# Key of day chunk: (symbol, exchange, interval, day), interval is "" for tick
+ChunkKey = Tuple[str, str, str, date]
+
+
+def to_naive(dt: datetime) -> datetime:
+    """
+    Convert datetime into database timezone without tzinfo.
+    """
+    if dt.tzinfo:
+        dt = dt.astimezone(DB_TZ).replace(tzinfo=None)
+    return dt
+
+
+def split_days(array: np.ndarray, days: List[date]) -> Dict[date, np.ndarray]:
+    """
+    Split sorted array into chunks of given consecutive days.
+    """
+    bounds = np.array(days + [days[-1] + timedelta(days=1)], dtype="M8[us]")
+    indexes = np.searchsorted(array["datetime"], bounds, side="left")
+
+    return {
+        day: array[indexes[n]:indexes[n + 1]].copy()
+        for n, day in enumerate(days)
+    }
+
+
+def to_bars(
+    array: np.ndarray,
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval
+) -> List[BarData]:
+    """
+    Generate BarData objects from array, column by column.
+    """
+    dts = array["datetime"].tolist()
+    bars = [
+        BarData(
+            symbol=symbol,
+            exchange=exchange,
+            datetime=dt.replace(tzinfo=DB_TZ),
+            interval=interval,
+            gateway_name="DB",
+        )
+        for dt in dts
+    ]
+
+    for name in BAR_FIELDS:
+        for bar, value in zip(bars, array[name].tolist()):
+            setattr(bar, name, value)
+
+    return bars
+
+
+def to_ticks(array: np.ndarray, symbol: str, exchange: Exchange) -> List[TickData]:
+    """
+    Generate TickData objects from array, column by column.
+    """
+    dts = array["datetime"].tolist()
+    names = np.char.decode(array["name"], "utf-8", errors="ignore").tolist()
+    ticks = [
+        TickData(
+            symbol=symbol,
+            exchange=exchange,
+            datetime=dt.replace(tzinfo=DB_TZ),
+            name=name,
+            gateway_name="DB",
+        )
+        for dt, name in zip(dts, names)
+    ]
+
+    for name in TICK_FIELDS:
+        for tick, value in zip(ticks, array[name].tolist()):
+            setattr(tick, name, value)
+
+    return ticks
+
+
+class RangeCache:
+    """
+    Shared by backtesting engines and CtaEngine through range_cache.
+    Days not ended yet are never cached, since data of them may still
+    be recorded into database.
+    """
+
+    max_bytes: int = 512 * 1024 * 1024
+
+    # Files are not refreshed when history of ended days is changed
+    # in database, call invalidate() after importing such data.
+    disk_enabled: bool = SETTINGS["cache.disk"]
+    disk_folder: str = "range_cache"
+
+    def __init__(self, database_manager: BaseDatabaseManager = None):
+        """"""
+        self._database_manager: Optional[BaseDatabaseManager] = database_manager
+
+        self.chunks: "OrderedDict[ChunkKey, np.ndarray]" = OrderedDict()
+        self.size: int = 0
+        self.lock: Lock = Lock()
+
+        self.hit_count: int = 0
+        self.miss_count: int = 0
+
+    @property
+    def database_manager(self) -> BaseDatabaseManager:
+        """
+        Resolved when first used, so that importing this module does
+        not initialize database connection.
+        """
+        if not self._database_manager:
+            from vnpy.trader.database import database_manager
+            self._database_manager = database_manager
+        return self._database_manager
+
+    def get_chunk(self, key: ChunkKey) -> Optional[np.ndarray]:
+        """"""
+        with self.lock:
+            array = self.chunks.get(key, None)
+            if array is not None:
+                self.chunks.move_to_end(key)
+            return array
+
+    def put_chunk(self, key: ChunkKey, array: np.ndarray) -> None:
+        """
+        Add chunk into cache, and evict least recently used ones when
+        byte budget exceeded.
+        """
+        with self.lock:
+            old = self.chunks.pop(key, None)
+            if old is not None:
+                self.size -= old.nbytes
+
+            self.chunks[key] = array
+            self.size += array.nbytes
+
+            while self.size > self.max_bytes and len(self.chunks) > 1:
+                _, evicted = self.chunks.popitem(last=False)
+                self.size -= evicted.nbytes
+
+    def get_disk_path(self, key: ChunkKey) -> Path:
+        """"""
+        symbol, exchange, interval, day = key
+        return get_folder_path(self.disk_folder).joinpath(
+            exchange, symbol, interval or "tick", f"{day.strftime('%Y%m%d')}.npy"
+        )
+
+    def load_disk_chunk(self, key: ChunkKey) -> Optional[np.ndarray]:
+        """
+        Open day chunk file as read-only memory map.
+        """
+        path = self.get_disk_path(key)
+        if not path.exists():
+            return None
+
+        try:
+            return np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+    def save_disk_chunk(self, key: ChunkKey, array: np.ndarray) -> np.ndarray:
+        """
+        Write day chunk file, then reopen it as memory map. File is
+        written under temp name and renamed, so other processes never
+        open a partial file.
+        """
+        path = self.get_disk_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        temp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+        with open(temp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(temp_path, path)
+
+        return np.load(path, mmap_mode="r")
+
+    def load_days(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Optional[Interval],
+        days: List[date]
+    ) -> Dict[date, np.ndarray]:
+        """
+        Load consecutive days from database as one query, and split
+        result into day chunks.
+        """
+        start = datetime.combine(days[0], time.min)
+        end = datetime.combine(days[-1], time.max)
+
+        if interval:
+            array = self.database_manager.load_bar_arrays(
+                symbol, exchange, interval, start, end
+            )
+        else:
+            array = self.database_manager.load_tick_arrays(
+                symbol, exchange, start, end
+            )
+
+        return split_days(array, days)
+
+    def load_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Optional[Interval],
+        start: datetime,
+        end: datetime
+    ) -> np.ndarray:
+        """
+        Load bar array (or tick array if interval is None) of range
+        [start, end], both included.
+        """
+        start = to_naive(start)
+        end = to_naive(end)
+
+        if interval:
+            dtype = BAR_DTYPE
+            interval_value = interval.value
+        else:
+            dtype = TICK_DTYPE
+            interval_value = ""
+
+        if end < start:
+            return np.empty(0, dtype=dtype)
+
+        today = datetime.now(DB_TZ).date()
+        day_count = (end.date() - start.date()).days + 1
+        days = [start.date() + timedelta(days=n) for n in range(day_count)]
+
+        arrays: Dict[date, np.ndarray] = {}
+        missing: List[date] = []
+
+        for day in days:
+            key = (symbol, exchange.value, interval_value, day)
+            array = self.get_chunk(key)
+
+            if array is None and self.disk_enabled and day < today:
+                array = self.load_disk_chunk(key)
+                if array is not None:
+                    self.put_chunk(key, array)
+
+            if array is not None:
+                arrays[day] = array
+                self.hit_count += 1
+            else:
+                missing.append(day)
+                self.miss_count += 1
+
+        # Query each run of consecutive missing days at once
+        runs: List[List[date]] = []
+        for day in missing:
+            if runs and (day - runs[-1][-1]).days == 1:
+                runs[-1].append(day)
+            else:
+                runs.append([day])
+
+        for run in runs:
+            loaded = self.load_days(symbol, exchange, interval, run)
+
+            for day, array in loaded.items():
+                if day < today:
+                    key = (symbol, exchange.value, interval_value, day)
+
+                    # Empty days are kept in memory only, so that data
+                    # imported later is not hidden by a persisted empty file
+                    if self.disk_enabled and len(array):
+                        array = self.save_disk_chunk(key, array)
+                    self.put_chunk(key, array)
+
+                arrays[day] = array
+
+        chunks = [arrays[day] for day in days if len(arrays[day])]
+        if not chunks:
+            return np.empty(0, dtype=dtype)
+
+        array = np.concatenate(chunks)
+
+        dts = array["datetime"]
+        left = np.searchsorted(dts, np.datetime64(start, "us"), side="left")
+        right = np.searchsorted(dts, np.datetime64(end, "us"), side="right")
+        return array[left:right]
+
+    def load_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> List[BarData]:
+        """"""
+        array = self.load_array(symbol, exchange, interval, start, end)
+        return to_bars(array, symbol, exchange, interval)
+
+    def load_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> List[TickData]:
+        """"""
+        array = self.load_array(symbol, exchange, None, start, end)
+        return to_ticks(array, symbol, exchange)
+
+    def invalidate(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Optional[Interval],
+        start: datetime = None,
+        end: datetime = None
+    ) -> None:
+        """
+        Remove cached chunks (in memory and on disk) of days in range
+        [start, end] after data is changed in database. All days are
+        removed if start/end is None.
+        """
+        interval_value = interval.value if interval else ""
+        start_day = to_naive(start).date() if start else date.min
+        end_day = to_naive(end).date() if end else date.max
+
+        with self.lock:
+            keys = [
+                key for key in self.chunks
+                if key[:3] == (symbol, exchange.value, interval_value)
+                and start_day <= key[3] <= end_day
+            ]
+            for key in keys:
+                self.size -= self.chunks.pop(key).nbytes
+
+            if not self.disk_enabled:
+                return
+
+            folder = get_folder_path(self.disk_folder).joinpath(
+                exchange.value, symbol, interval_value or "tick"
+            )
+            if not folder.exists():
+                return
+
+            for path in folder.glob("*.npy"):
+                try:
+                    day = datetime.strptime(path.stem, "%Y%m%d").date()
+                except ValueError:
+                    continue
+
+                if start_day <= day <= end_day:
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        pass
+
+    def clear(self, disk: bool = False) -> None:
+        """
+        Clear cached chunks in memory, and also files on disk if disk is True.
+        """
+        with self.lock:
+            self.chunks.clear()
+            self.size = 0
+
+            if disk:
+                shutil.rmtree(get_folder_path(self.disk_folder), ignore_errors=True)
+
+
+range_cache = RangeCache()
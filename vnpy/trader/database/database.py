@@ -4,6 +4,8 @@ from enum import Enum
 from typing import Optional, Sequence, List, Dict, TYPE_CHECKING
 from pytz import timezone
 
+import numpy as np
+
 from vnpy.trader.setting import SETTINGS
 
 if TYPE_CHECKING:
@@ -20,6 +22,110 @@ class Driver(Enum):
     POSTGRESQL = "postgresql"
     MONGODB = "mongodb"
     INFLUX = "influxdb"
+    ARCHIVE = "archive"
+
+
+# Numeric fields of bar/tick data, used for columnar storage.
+BAR_FIELDS = [
+    "volume",
+    "open_interest",
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+]
+
+TICK_FIELDS = [
+    "volume",
+    "open_interest",
+    "last_price",
+    "last_volume",
+    "limit_up",
+    "limit_down",
+    "open_price",
+    "high_price",
+    "low_price",
+    "pre_close",
+    "bid_price_1",
+    "bid_price_2",
+    "bid_price_3",
+    "bid_price_4",
+    "bid_price_5",
+    "ask_price_1",
+    "ask_price_2",
+    "ask_price_3",
+    "ask_price_4",
+    "ask_price_5",
+    "bid_volume_1",
+    "bid_volume_2",
+    "bid_volume_3",
+    "bid_volume_4",
+    "bid_volume_5",
+    "ask_volume_1",
+    "ask_volume_2",
+    "ask_volume_3",
+    "ask_volume_4",
+    "ask_volume_5",
+]
+
+# Datetime is stored without tzinfo in database timezone.
+BAR_DTYPE = np.dtype(
+    [("datetime", "M8[us]")] + [(name, "f8") for name in BAR_FIELDS]
+)
+TICK_DTYPE = np.dtype(
+    [("datetime", "M8[us]"), ("name", "S32")] + [(name, "f8") for name in TICK_FIELDS]
+)
+
+
+def to_db_datetime(dt: datetime) -> np.datetime64:
+    """
+    Convert datetime into database timezone without tzinfo.
+    """
+    if dt.tzinfo:
+        dt = dt.astimezone(DB_TZ).replace(tzinfo=None)
+    return np.datetime64(dt, "us")
+
+
+def convert_timezone(dts: np.ndarray, from_tz, to_tz) -> np.ndarray:
+    """
+    Convert naive datetime64 array from one timezone into another.
+    Offset is computed once for each distinct hour, since it only
+    changes on the hour.
+    """
+    if from_tz.zone == to_tz.zone or not len(dts):
+        return dts
+
+    hours, inverse = np.unique(dts.astype("M8[h]"), return_inverse=True)
+
+    offsets = []
+    for hour in hours.tolist():
+        converted = from_tz.localize(hour).astimezone(to_tz).replace(tzinfo=None)
+        offsets.append(converted - hour)
+
+    return dts + np.array(offsets, dtype="m8[us]")[inverse]
+
+
+def to_array(rows: Sequence[tuple], dtype: np.dtype) -> np.ndarray:
+    """
+    Convert rows of values (ordered as dtype fields) into structured
+    array, which is filled column by column. Missing float value is
+    stored as 0.
+    """
+    array = np.zeros(len(rows), dtype=dtype)
+    if not len(rows):
+        return array
+
+    for name, column in zip(dtype.names, zip(*rows)):
+        kind = dtype[name].kind
+
+        if kind == "S":
+            column = [v.encode("utf-8") if v else b"" for v in column]
+        elif kind == "f":
+            column = np.nan_to_num(np.array(column, dtype=float), copy=False)
+
+        array[name] = column
+
+    return array
 
 
 class BaseDatabaseManager(ABC):
@@ -45,6 +151,51 @@ class BaseDatabaseManager(ABC):
     ) -> Sequence["TickData"]:
         pass
 
+    def load_bar_arrays(
+        self,
+        symbol: str,
+        exchange: "Exchange",
+        interval: "Interval",
+        start: datetime,
+        end: datetime
+    ) -> np.ndarray:
+        """
+        Load bar data as structured array of BAR_DTYPE.
+
+        Fallback on load_bar_data, database should override this
+        to read values without creating BarData objects.
+        """
+        bars = self.load_bar_data(symbol, exchange, interval, start, end)
+
+        rows = [
+            (bar.datetime.replace(tzinfo=None),)
+            + tuple(getattr(bar, name) for name in BAR_FIELDS)
+            for bar in bars
+        ]
+        return to_array(rows, BAR_DTYPE)
+
+    def load_tick_arrays(
+        self,
+        symbol: str,
+        exchange: "Exchange",
+        start: datetime,
+        end: datetime
+    ) -> np.ndarray:
+        """
+        Load tick data as structured array of TICK_DTYPE.
+
+        Fallback on load_tick_data, database should override this
+        to read values without creating TickData objects.
+        """
+        ticks = self.load_tick_data(symbol, exchange, start, end)
+
+        rows = [
+            (tick.datetime.replace(tzinfo=None), tick.name)
+            + tuple(getattr(tick, name) for name in TICK_FIELDS)
+            for tick in ticks
+        ]
+        return to_array(rows, TICK_DTYPE)
+
     @abstractmethod
     def save_bar_data(
         self,
@@ -59,6 +210,46 @@ class BaseDatabaseManager(ABC):
     ):
         pass
 
+    def save_bar_arrays(
+        self,
+        array: np.ndarray,
+        symbol: str,
+        exchange: "Exchange",
+        interval: "Interval"
+    ):
+        """
+        Save structured array of BAR_DTYPE.
+
+        Fallback on save_bar_data, database should override this
+        to write values without creating BarData objects.
+        """
+        from .cache import to_bars
+
+        self.save_bar_data(to_bars(array, symbol, exchange, interval))
+
+    def save_tick_arrays(
+        self,
+        array: np.ndarray,
+        symbol: str,
+        exchange: "Exchange"
+    ):
+        """
+        Save structured array of TICK_DTYPE.
+
+        Fallback on save_tick_data, database should override this
+        to write values without creating TickData objects.
+        """
+        from .cache import to_ticks
+
+        self.save_tick_data(to_ticks(array, symbol, exchange))
+
+    def merge_staging(self) -> int:
+        """
+        Merge data appended into staging area into main storage, return
+        count of merged records. Only needed by database in staging mode.
+        """
+        return 0
+
     @abstractmethod
     def get_newest_bar_data(
         self,
@@ -108,6 +299,12 @@ class BaseDatabaseManager(ABC):
         """
         pass
 
+    def get_tick_data_statistics(self) -> List[Dict]:
+        """
+        Return tick data avaible in database with a list of symbol/exchange/count.
+        """
+        return []
+
     @abstractmethod
     def delete_bar_data(
         self,
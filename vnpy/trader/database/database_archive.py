@@ -0,0 +1,465 @@
+"""
+Append-only columnar archive for recording market data.
+
+Ticks are written into one binary file per symbol and trading day,
+bars into one file per symbol and interval. Each file is a flat array
+of fixed numpy dtype (TICK_DTYPE/BAR_DTYPE), sorted by datetime, so it
+can be memory-mapped and sliced by binary search when loading.
+"""
+
+import logging
+import os
+import shutil
+from collections.abc import Sequence as SequenceABC
+from datetime import datetime, timedelta, date
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData, TickData
+from vnpy.trader.session import CHINA_TZ
+from vnpy.trader.utility import get_folder_path
+
+from .database import (
+    BaseDatabaseManager,
+    Driver,
+    DB_TZ,
+    BAR_FIELDS,
+    TICK_FIELDS,
+    BAR_DTYPE,
+    TICK_DTYPE,
+    convert_timezone,
+    to_db_datetime
+)
+
+
+# Ticks after this hour belong to night session of next trading day
+NIGHT_START_HOUR = 18
+
+# Same logger as LogEngine, so that warnings are output with trader logs
+logger = logging.getLogger("VN Trader")
+
+
+def init(_: Driver, settings: dict):
+    database = settings["database"]
+    root = get_folder_path(database)
+    return ArchiveManager(root)
+
+
+def get_trading_day(dt: datetime) -> date:
+    """
+    Get trading day of datetime, night session is counted into
+    next weekday (holidays are not considered). Naive datetime is in
+    database timezone, and converted into China time of sessions.
+    """
+    if not dt.tzinfo:
+        dt = DB_TZ.localize(dt)
+    dt = dt.astimezone(CHINA_TZ)
+
+    day = dt.date()
+    if dt.hour >= NIGHT_START_HOUR:
+        day += timedelta(days=1)
+
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+
+    return day
+
+
+def read_array(path: Path, dtype: np.dtype) -> np.ndarray:
+    """
+    Memory-map data file in read-only mode.
+    """
+    if not path.exists() or path.stat().st_size < dtype.itemsize:
+        return np.empty(0, dtype=dtype)
+
+    count = path.stat().st_size // dtype.itemsize
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+
+def repair_file(path: Path, dtype: np.dtype) -> None:
+    """
+    Truncate torn record at the end of data file (e.g. process killed
+    during write), so that later records are appended aligned.
+    """
+    if not path.exists():
+        return
+
+    size = path.stat().st_size
+    valid_size = size - size % dtype.itemsize
+    if valid_size == size:
+        return
+
+    os.truncate(path, valid_size)
+    logger.warning(f"截断数据文件{path}末尾不完整记录：{size - valid_size}字节")
+
+
+def keep_last(array: np.ndarray) -> np.ndarray:
+    """
+    Remove records of sorted array with same datetime, except the last one.
+    """
+    dts = array["datetime"]
+    mask = np.ones(len(array), dtype=bool)
+    mask[:-1] = dts[:-1] != dts[1:]
+    return array[mask]
+
+
+def slice_array(array: np.ndarray, start: np.datetime64, end: np.datetime64) -> np.ndarray:
+    """
+    Select records between start and end (both included) by binary search.
+    """
+    dts = array["datetime"]
+    left = np.searchsorted(dts, start, side="left")
+    right = np.searchsorted(dts, end, side="right")
+    return array[left:right]
+
+
+def to_bar(record: np.void, symbol: str, exchange: Exchange, interval: Interval) -> BarData:
+    """
+    Generate BarData object from archive record.
+    """
+    bar = BarData(
+        symbol=symbol,
+        exchange=exchange,
+        datetime=record["datetime"].item().replace(tzinfo=DB_TZ),
+        interval=interval,
+        gateway_name="DB",
+    )
+
+    for name in BAR_FIELDS:
+        setattr(bar, name, float(record[name]))
+
+    return bar
+
+
+def to_tick(record: np.void, symbol: str, exchange: Exchange) -> TickData:
+    """
+    Generate TickData object from archive record.
+    """
+    tick = TickData(
+        symbol=symbol,
+        exchange=exchange,
+        datetime=record["datetime"].item().replace(tzinfo=DB_TZ),
+        name=record["name"].decode("utf-8", errors="ignore"),
+        gateway_name="DB",
+    )
+
+    for name in TICK_FIELDS:
+        setattr(tick, name, float(record[name]))
+
+    return tick
+
+
+class ArchiveSequence(SequenceABC):
+    """
+    Lazy sequence over memory-mapped records, data object is only
+    created when accessed.
+    """
+
+    def __init__(self, arrays: List[np.ndarray], converter):
+        """"""
+        self.arrays = [array for array in arrays if len(array)]
+        self.converter = converter
+        self.offsets = np.cumsum([0] + [len(array) for array in self.arrays])
+
+    def __len__(self) -> int:
+        """"""
+        return int(self.offsets[-1])
+
+    def __getitem__(self, index):
+        """"""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("archive sequence index out of range")
+
+        n = int(np.searchsorted(self.offsets, index, side="right")) - 1
+        record = self.arrays[n][index - self.offsets[n]]
+        return self.converter(record)
+
+    def __iter__(self):
+        """"""
+        for array in self.arrays:
+            for record in array:
+                yield self.converter(record)
+
+
+class ArchiveManager(BaseDatabaseManager):
+    """
+    Data files are stored as:
+        tick/{exchange}/{symbol}/{trading_day}.dat
+        bar/{exchange}/{symbol}/{interval}.dat
+
+    Data is appended in recording. Records not later than the last one
+    in file are merged by rewriting the file, which keeps file sorted
+    and datetime unique (the last record saved is kept, same as upsert
+    of other databases).
+    """
+
+    def __init__(self, root: Path):
+        """"""
+        self.root: Path = root
+        self.lock: Lock = Lock()
+        self.last_datetimes: Dict[Path, np.datetime64] = {}
+
+    def get_tick_path(self, symbol: str, exchange: Exchange, day: date) -> Path:
+        """"""
+        return self.root.joinpath(
+            "tick", exchange.value, symbol, f"{day.strftime('%Y%m%d')}.dat"
+        )
+
+    def get_bar_path(self, symbol: str, exchange: Exchange, interval: Interval) -> Path:
+        """"""
+        return self.root.joinpath(
+            "bar", exchange.value, symbol, f"{interval.value}.dat"
+        )
+
+    def get_tick_paths(self, symbol: str, exchange: Exchange) -> List[Path]:
+        """
+        Get all tick files of symbol sorted by trading day.
+        """
+        folder = self.root.joinpath("tick", exchange.value, symbol)
+        if not folder.exists():
+            return []
+        return sorted(folder.glob("*.dat"))
+
+    def append(self, path: Path, array: np.ndarray):
+        """
+        Save records into data file. Records later than the last one
+        in file are appended, otherwise they are merged into file.
+        """
+        array = keep_last(np.sort(array, order="datetime", kind="stable"))
+        if not len(array):
+            return
+
+        last_dt = self.last_datetimes.get(path, None)
+        if last_dt is None:
+            repair_file(path, array.dtype)
+
+            stored = read_array(path, array.dtype)
+            if len(stored):
+                last_dt = stored["datetime"][-1]
+
+        if last_dt is not None and array["datetime"][0] <= last_dt:
+            self.merge(path, array)
+            return
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "ab") as f:
+            f.write(array.tobytes())
+
+        self.last_datetimes[path] = array["datetime"][-1]
+
+    def merge(self, path: Path, array: np.ndarray):
+        """
+        Rewrite data file with stored records and sorted new records
+        (e.g. history imported later). File is written under temp name
+        and renamed, so readers never see a partial file.
+        """
+        stored = np.array(read_array(path, array.dtype))
+
+        merged = np.concatenate([stored, array])
+        merged = keep_last(np.sort(merged, order="datetime", kind="stable"))
+
+        temp_path = path.with_name(f"{path.name}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(merged.tobytes())
+        os.replace(temp_path, path)
+
+        self.last_datetimes[path] = merged["datetime"][-1]
+
+    def load_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+    ) -> Sequence[BarData]:
+        path = self.get_bar_path(symbol, exchange, interval)
+        array = read_array(path, BAR_DTYPE)
+        array = slice_array(array, to_db_datetime(start), to_db_datetime(end))
+
+        return ArchiveSequence(
+            [array],
+            lambda record: to_bar(record, symbol, exchange, interval)
+        )
+
+    def load_tick_data(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime
+    ) -> Sequence[TickData]:
+        start_day = get_trading_day(start).strftime("%Y%m%d")
+        end_day = get_trading_day(end).strftime("%Y%m%d")
+        start_dt = to_db_datetime(start)
+        end_dt = to_db_datetime(end)
+
+        arrays = []
+        for path in self.get_tick_paths(symbol, exchange):
+            if not start_day <= path.stem <= end_day:
+                continue
+
+            array = read_array(path, TICK_DTYPE)
+            arrays.append(slice_array(array, start_dt, end_dt))
+
+        return ArchiveSequence(
+            arrays,
+            lambda record: to_tick(record, symbol, exchange)
+        )
+
+    def load_bar_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+    ) -> np.ndarray:
+        path = self.get_bar_path(symbol, exchange, interval)
+        array = read_array(path, BAR_DTYPE)
+        return slice_array(array, to_db_datetime(start), to_db_datetime(end))
+
+    def load_tick_arrays(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime
+    ) -> np.ndarray:
+        data = self.load_tick_data(symbol, exchange, start, end)
+
+        if len(data.arrays) == 1:
+            return data.arrays[0]
+        elif data.arrays:
+            return np.concatenate(data.arrays)
+        return np.empty(0, dtype=TICK_DTYPE)
+
+    def save_bar_data(self, datas: Sequence[BarData]):
+        groups: Dict[Path, list] = {}
+
+        for bar in datas:
+            path = self.get_bar_path(bar.symbol, bar.exchange, bar.interval)
+            record = (to_db_datetime(bar.datetime),) + tuple(
+                getattr(bar, name) for name in BAR_FIELDS
+            )
+            groups.setdefault(path, []).append(record)
+
+        with self.lock:
+            for path, records in groups.items():
+                self.append(path, np.array(records, dtype=BAR_DTYPE))
+
+    def save_tick_data(self, datas: Sequence[TickData]):
+        groups: Dict[Path, list] = {}
+
+        for tick in datas:
+            day = get_trading_day(tick.datetime)
+            path = self.get_tick_path(tick.symbol, tick.exchange, day)
+            record = (
+                to_db_datetime(tick.datetime),
+                tick.name.encode("utf-8")[:TICK_DTYPE["name"].itemsize]
+            ) + tuple(getattr(tick, name) for name in TICK_FIELDS)
+            groups.setdefault(path, []).append(record)
+
+        with self.lock:
+            for path, records in groups.items():
+                self.append(path, np.array(records, dtype=TICK_DTYPE))
+
+    def save_bar_arrays(
+        self,
+        array: np.ndarray,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval
+    ):
+        if not len(array):
+            return
+
+        path = self.get_bar_path(symbol, exchange, interval)
+        with self.lock:
+            self.append(path, array.astype(BAR_DTYPE, copy=False))
+
+    def save_tick_arrays(self, array: np.ndarray, symbol: str, exchange: Exchange):
+        if not len(array):
+            return
+
+        # Vectorized get_trading_day
+        dts = convert_timezone(array["datetime"], DB_TZ, CHINA_TZ)
+        shifted = dts + np.timedelta64(24 - NIGHT_START_HOUR, "h")
+        days = np.busday_offset(shifted.astype("M8[D]"), 0, roll="forward")
+
+        with self.lock:
+            for day in np.unique(days):
+                path = self.get_tick_path(symbol, exchange, day.item())
+                self.append(path, array[days == day].astype(TICK_DTYPE, copy=False))
+
+    def get_newest_bar_data(
+        self, symbol: str, exchange: "Exchange", interval: "Interval"
+    ) -> Optional["BarData"]:
+        path = self.get_bar_path(symbol, exchange, interval)
+        array = read_array(path, BAR_DTYPE)
+
+        if len(array):
+            return to_bar(array[-1], symbol, exchange, interval)
+        return None
+
+    def get_oldest_bar_data(
+        self, symbol: str, exchange: "Exchange", interval: "Interval"
+    ) -> Optional["BarData"]:
+        path = self.get_bar_path(symbol, exchange, interval)
+        array = read_array(path, BAR_DTYPE)
+
+        if len(array):
+            return to_bar(array[0], symbol, exchange, interval)
+        return None
+
+    def get_newest_tick_data(
+        self, symbol: str, exchange: "Exchange"
+    ) -> Optional["TickData"]:
+        for path in reversed(self.get_tick_paths(symbol, exchange)):
+            array = read_array(path, TICK_DTYPE)
+
+            if len(array):
+                return to_tick(array[-1], symbol, exchange)
+        return None
+
+    def get_bar_data_statistics(self) -> List[Dict]:
+        """"""
+        result = []
+
+        for path in sorted(self.root.glob("bar/*/*/*.dat")):
+            result.append({
+                "symbol": path.parent.name,
+                "exchange": path.parent.parent.name,
+                "interval": path.stem,
+                "count": path.stat().st_size // BAR_DTYPE.itemsize
+            })
+
+        return result
+
+    def delete_bar_data(
+        self,
+        symbol: str,
+        exchange: "Exchange",
+        interval: "Interval"
+    ) -> int:
+        """
+        Delete all bar data with given symbol + exchange + interval.
+        """
+        path = self.get_bar_path(symbol, exchange, interval)
+        if not path.exists():
+            return 0
+
+        with self.lock:
+            count = path.stat().st_size // BAR_DTYPE.itemsize
+            path.unlink()
+            self.last_datetimes.pop(path, None)
+
+        return count
+
+    def clean(self, symbol: str):
+        with self.lock:
+            for folder in self.root.glob(f"*/*/{symbol}"):
+                shutil.rmtree(folder)
+
+            self.last_datetimes.clear()
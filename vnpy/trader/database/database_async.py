@@ -0,0 +1,148 @@
+"""
+Asynchronous facade of database manager.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Sequence
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData, TickData
+
+from .database import BaseDatabaseManager
+
+
+class AsyncDatabaseManager:
+    """
+    Run calls of a database manager in a bounded thread pool, and return
+    futures instead of results.
+
+    Connection of SQL database is thread local in peewee, and pymongo/
+    influxdb clients keep their own connection pools, so every worker
+    thread works on its own connection and the number of connections is
+    bounded by max_workers.
+    """
+
+    def __init__(
+        self,
+        database_manager: BaseDatabaseManager = None,
+        max_workers: int = 4
+    ):
+        """"""
+        if not database_manager:
+            from vnpy.trader.database import database_manager
+
+        self.database_manager: BaseDatabaseManager = database_manager
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="DatabaseWorker"
+        )
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Run any function in the pool.
+        """
+        return self.executor.submit(func, *args, **kwargs)
+
+    def load_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> Future:
+        """"""
+        return self.submit(
+            self.database_manager.load_bar_data,
+            symbol, exchange, interval, start, end
+        )
+
+    def load_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> Future:
+        """"""
+        return self.submit(
+            self.database_manager.load_tick_data,
+            symbol, exchange, start, end
+        )
+
+    def load_bar_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> Future:
+        """"""
+        return self.submit(
+            self.database_manager.load_bar_arrays,
+            symbol, exchange, interval, start, end
+        )
+
+    def load_tick_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> Future:
+        """"""
+        return self.submit(
+            self.database_manager.load_tick_arrays,
+            symbol, exchange, start, end
+        )
+
+    def save_bar_data(self, datas: Sequence[BarData]) -> Future:
+        """"""
+        return self.submit(self.database_manager.save_bar_data, datas)
+
+    def save_tick_data(self, datas: Sequence[TickData]) -> Future:
+        """"""
+        return self.submit(self.database_manager.save_tick_data, datas)
+
+    def get_newest_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval
+    ) -> Future:
+        """"""
+        return self.submit(
+            self.database_manager.get_newest_bar_data,
+            symbol, exchange, interval
+        )
+
+    def get_oldest_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval
+    ) -> Future:
+        """"""
+        return self.submit(
+            self.database_manager.get_oldest_bar_data,
+            symbol, exchange, interval
+        )
+
+    def get_newest_tick_data(self, symbol: str, exchange: Exchange) -> Future:
+        """"""
+        return self.submit(
+            self.database_manager.get_newest_tick_data,
+            symbol, exchange
+        )
+
+    def get_bar_data_statistics(self) -> Future:
+        """"""
+        return self.submit(self.database_manager.get_bar_data_statistics)
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop the pool, by default after all submitted calls finished.
+        """
+        self.executor.shutdown(wait=wait)
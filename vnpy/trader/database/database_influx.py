@@ -1,18 +1,38 @@
 from datetime import datetime
 from typing import Optional, Sequence, List
 
+import numpy as np
 from influxdb import InfluxDBClient
 
 from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
 from vnpy.trader.utility import generate_vt_symbol
 
-from .database import BaseDatabaseManager, Driver, DB_TZ
+from .database import (
+    BaseDatabaseManager,
+    Driver,
+    DB_TZ,
+    BAR_FIELDS,
+    TICK_FIELDS,
+    BAR_DTYPE,
+    TICK_DTYPE,
+    to_array
+)
 
 
 influx_database = ""
 influx_client = None
 
+# Points per write request, and points per chunk of query response
+influx_batch_size = 10000
+
+# Precision of point timestamp, one of "s", "ms", "u", "n"
+influx_time_precision = "ms"
+
+# numpy datetime units of precisions, and epoch names used in query
+PRECISION_UNITS = {"s": "s", "ms": "ms", "u": "us", "n": "ns"}
+EPOCH_PRECISIONS = {"s": "s", "ms": "ms", "u": "u", "n": "ns"}
+
 
 def init(_: Driver, settings: dict):
     database = settings["database"]
@@ -27,36 +47,82 @@ def init(_: Driver, settings: dict):
 
     global influx_client
     global influx_database
+    global influx_batch_size
+    global influx_time_precision
 
     influx_database = database
+    influx_batch_size = settings.get("batch_size", influx_batch_size)
+    influx_time_precision = settings.get("time_precision", influx_time_precision)
+    assert influx_time_precision in PRECISION_UNITS
     influx_client = InfluxDBClient(host, port, username, password, database)
     influx_client.create_database(database)
 
     return InfluxManager()
 
 
+def to_influx_time(dt: datetime) -> str:
+    """
+    Datetime is stored in database timezone as UTC time in influxdb.
+    """
+    if dt.tzinfo:
+        dt = dt.astimezone(DB_TZ).replace(tzinfo=None)
+    return dt.isoformat() + "Z"
+
+
+def to_epoch(dt: datetime) -> int:
+    """"""
+    if dt.tzinfo:
+        dt = dt.astimezone(DB_TZ).replace(tzinfo=None)
+
+    unit = PRECISION_UNITS[influx_time_precision]
+    return int(np.datetime64(dt, unit).astype(np.int64))
+
+
+def from_epoch(value: int) -> np.datetime64:
+    """"""
+    unit = PRECISION_UNITS[influx_time_precision]
+    return np.datetime64(value, unit).astype("M8[us]")
+
+
+def escape_string(value: str) -> str:
+    """
+    Escape string field value for line protocol.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def escape_tag(value: str) -> str:
+    """
+    Escape tag key or value for line protocol, e.g. spread name with spaces.
+    """
+    return (
+        value.replace("\\", "\\\\")
+        .replace(" ", "\\ ")
+        .replace(",", "\\,")
+        .replace("=", "\\=")
+        .replace("\n", "\\n")
+    )
+
+
 class InfluxManager(BaseDatabaseManager):
 
-    def load_bar_data(
+    def query_bar_points(
         self,
         symbol: str,
         exchange: Exchange,
         interval: Interval,
         start: datetime,
         end: datetime,
-    ) -> Sequence[BarData]:
-        if isinstance(start, datetime):
-            start = start.date()
-
-        if isinstance(end, datetime):
-            end = end.date()
-
+    ):
+        """
+        Query bar data points in range.
+        """
         query = (
             "select * from bar_data"
             " where vt_symbol=$vt_symbol"
             " and interval=$interval"
-            f" and time >= '{start.isoformat()}'"
-            f" and time <= '{end.isoformat()}';"
+            f" and time >= '{to_influx_time(start)}'"
+            f" and time <= '{to_influx_time(end)}';"
         )
 
         bind_params = {
@@ -65,7 +131,17 @@ class InfluxManager(BaseDatabaseManager):
         }
 
         result = influx_client.query(query, bind_params=bind_params)
-        points = result.get_points()
+        return result.get_points()
+
+    def load_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+    ) -> Sequence[BarData]:
+        points = self.query_bar_points(symbol, exchange, interval, start, end)
 
         data = []
         for d in points:
@@ -88,18 +164,89 @@ class InfluxManager(BaseDatabaseManager):
 
         return data
 
+    def load_bar_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+    ) -> np.ndarray:
+        points = self.query_bar_points(symbol, exchange, interval, start, end)
+
+        # Strip "Z" suffix so that numpy parses time as naive datetime
+        rows = [
+            (d["time"].rstrip("Z"),) + tuple(d[name] for name in BAR_FIELDS)
+            for d in points
+        ]
+        return to_array(rows, BAR_DTYPE)
+
+    def query_tick_points(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime
+    ):
+        """
+        Query tick data points in range. Response is streamed in chunks,
+        with time returned as epoch integer.
+        """
+        query = (
+            "select * from tick_data"
+            " where vt_symbol=$vt_symbol"
+            f" and time >= '{to_influx_time(start)}'"
+            f" and time <= '{to_influx_time(end)}';"
+        )
+
+        bind_params = {"vt_symbol": generate_vt_symbol(symbol, exchange)}
+
+        results = influx_client.query(
+            query,
+            bind_params=bind_params,
+            epoch=EPOCH_PRECISIONS[influx_time_precision],
+            chunked=True,
+            chunk_size=influx_batch_size
+        )
+
+        for result in results:
+            yield from result.get_points()
+
     def load_tick_data(
         self, symbol: str, exchange: Exchange, start: datetime, end: datetime
     ) -> Sequence[TickData]:
-        pass
+        points = self.query_tick_points(symbol, exchange, start, end)
+
+        data = []
+        for d in points:
+            dt = from_epoch(d["time"]).item()
+
+            tick = TickData(
+                symbol=symbol,
+                exchange=exchange,
+                datetime=dt.replace(tzinfo=DB_TZ),
+                name=d["name"] or "",
+                gateway_name="DB"
+            )
+
+            for name in TICK_FIELDS:
+                setattr(tick, name, d[name] or 0)
+
+            data.append(tick)
+
+        return data
+
+    def load_tick_arrays(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime
+    ) -> np.ndarray:
+        points = self.query_tick_points(symbol, exchange, start, end)
+
+        rows = [
+            (from_epoch(d["time"]), d["name"]) + tuple(d[name] for name in TICK_FIELDS)
+            for d in points
+        ]
+        return to_array(rows, TICK_DTYPE)
 
     def save_bar_data(self, data: Sequence[BarData]):
         json_body = []
 
-        bar = data[0]
-        vt_symbol = bar.vt_symbol
-        interval = bar.interval.value
-
+        # Data may contain bars of different symbols when saved in batch
         for bar in data:
             dt = bar.datetime.astimezone(DB_TZ)
             dt = dt.replace(tzinfo=None)
@@ -107,8 +254,8 @@ class InfluxManager(BaseDatabaseManager):
             d = {
                 "measurement": "bar_data",
                 "tags": {
-                    "vt_symbol": vt_symbol,
-                    "interval": interval
+                    "vt_symbol": bar.vt_symbol,
+                    "interval": bar.interval.value
                 },
                 "time": dt.isoformat(),
                 "fields": {
@@ -125,7 +272,25 @@ class InfluxManager(BaseDatabaseManager):
         influx_client.write_points(json_body)
 
     def save_tick_data(self, data: Sequence[TickData]):
-        pass
+        lines = []
+
+        for tick in data:
+            fields = [f'name="{escape_string(tick.name)}"']
+            for name in TICK_FIELDS:
+                fields.append(f"{name}={float(getattr(tick, name))!r}")
+
+            line = (
+                f"tick_data,vt_symbol={escape_tag(tick.vt_symbol)} "
+                f"{','.join(fields)} {to_epoch(tick.datetime)}"
+            )
+            lines.append(line)
+
+        influx_client.write_points(
+            lines,
+            time_precision=influx_time_precision,
+            batch_size=influx_batch_size,
+            protocol="line"
+        )
 
     def get_newest_bar_data(
         self, symbol: str, exchange: "Exchange", interval: "Interval"
@@ -204,7 +369,36 @@ class InfluxManager(BaseDatabaseManager):
     def get_newest_tick_data(
         self, symbol: str, exchange: "Exchange"
     ) -> Optional["TickData"]:
-        pass
+        query = (
+            "select last(last_price), * from tick_data"
+            " where vt_symbol=$vt_symbol"
+        )
+
+        bind_params = {"vt_symbol": generate_vt_symbol(symbol, exchange)}
+
+        result = influx_client.query(
+            query,
+            bind_params=bind_params,
+            epoch=EPOCH_PRECISIONS[influx_time_precision]
+        )
+        points = result.get_points()
+
+        tick = None
+        for d in points:
+            dt = from_epoch(d["time"]).item()
+
+            tick = TickData(
+                symbol=symbol,
+                exchange=exchange,
+                datetime=dt.replace(tzinfo=DB_TZ),
+                name=d["name"] or "",
+                gateway_name="DB"
+            )
+
+            for name in TICK_FIELDS:
+                setattr(tick, name, d[name] or 0)
+
+        return tick
 
     def get_bar_data_statistics(self) -> List:
         query = "select count(close_price) from bar_data group by *"
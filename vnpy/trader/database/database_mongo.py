@@ -1,13 +1,28 @@
 from datetime import datetime
-from enum import Enum
 from typing import Optional, Sequence, List
 
+import numpy as np
+from bson import decode_all
 from mongoengine import DateTimeField, Document, FloatField, StringField, connect
+from pymongo import ASCENDING, UpdateOne
 
 from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
 
-from .database import BaseDatabaseManager, Driver, DB_TZ
+from .database import (
+    BaseDatabaseManager,
+    Driver,
+    DB_TZ,
+    BAR_FIELDS,
+    TICK_FIELDS,
+    BAR_DTYPE,
+    TICK_DTYPE,
+    to_array
+)
+
+
+# Upserts per bulk_write request
+MONGO_BATCH_SIZE = 10000
 
 
 def init(_: Driver, settings: dict):
@@ -191,6 +206,48 @@ class DbTickData(Document):
         return tick
 
 
+def convert_datetime(dt: datetime) -> datetime:
+    """"""
+    dt = dt.astimezone(DB_TZ)
+    return dt.replace(tzinfo=None)
+
+
+def to_bar(d: dict, symbol: str, exchange: Exchange, interval: Interval) -> BarData:
+    """
+    Generate BarData object from raw document.
+    """
+    bar = BarData(
+        symbol=symbol,
+        exchange=exchange,
+        datetime=d["datetime"].replace(tzinfo=DB_TZ),
+        interval=interval,
+        gateway_name="DB",
+    )
+
+    for name in BAR_FIELDS:
+        setattr(bar, name, d.get(name, None) or 0)
+
+    return bar
+
+
+def to_tick(d: dict, symbol: str, exchange: Exchange) -> TickData:
+    """
+    Generate TickData object from raw document.
+    """
+    tick = TickData(
+        symbol=symbol,
+        exchange=exchange,
+        datetime=d["datetime"].replace(tzinfo=DB_TZ),
+        name=d.get("name", None) or "",
+        gateway_name="DB",
+    )
+
+    for name in TICK_FIELDS:
+        setattr(tick, name, d.get(name, None) or 0)
+
+    return tick
+
+
 class MongoManager(BaseDatabaseManager):
 
     def load_bar_data(
@@ -201,60 +258,137 @@ class MongoManager(BaseDatabaseManager):
         start: datetime,
         end: datetime,
     ) -> Sequence[BarData]:
-        s = DbBarData.objects(
-            symbol=symbol,
-            exchange=exchange.value,
-            interval=interval.value,
-            datetime__gte=start,
-            datetime__lte=end,
+        filter = {
+            "symbol": symbol,
+            "exchange": exchange.value,
+            "interval": interval.value,
+            "datetime": {"$gte": start, "$lte": end},
+        }
+        projection = {name: 1 for name in BAR_DTYPE.names}
+        projection["_id"] = 0
+
+        cursor = (
+            DbBarData._get_collection()
+            .find(filter, projection)
+            .sort("datetime", ASCENDING)
         )
-        data = [db_bar.to_bar() for db_bar in s]
+
+        data = [to_bar(d, symbol, exchange, interval) for d in cursor]
         return data
 
     def load_tick_data(
         self, symbol: str, exchange: Exchange, start: datetime, end: datetime
     ) -> Sequence[TickData]:
-        s = DbTickData.objects(
-            symbol=symbol,
-            exchange=exchange.value,
-            datetime__gte=start,
-            datetime__lte=end,
+        filter = {
+            "symbol": symbol,
+            "exchange": exchange.value,
+            "datetime": {"$gte": start, "$lte": end},
+        }
+        projection = {name: 1 for name in TICK_DTYPE.names}
+        projection["_id"] = 0
+
+        cursor = (
+            DbTickData._get_collection()
+            .find(filter, projection)
+            .sort("datetime", ASCENDING)
         )
-        data = [db_tick.to_tick() for db_tick in s]
+
+        data = [to_tick(d, symbol, exchange) for d in cursor]
         return data
 
     @staticmethod
-    def to_update_param(d) -> dict:
-        dt = d.datetime.astimezone(DB_TZ)
-        d.datetime = dt.replace(tzinfo=None)
+    def load_arrays(document: type, filter: dict, dtype: np.dtype) -> np.ndarray:
+        """
+        Query raw BSON batches from collection with projection on dtype
+        fields, skipping creation of Document objects.
+        """
+        projection = {name: 1 for name in dtype.names}
+        projection["_id"] = 0
+
+        cursor = (
+            document._get_collection()
+            .find_raw_batches(filter, projection)
+            .sort("datetime", ASCENDING)
+        )
+
+        rows = []
+        for batch in cursor:
+            for d in decode_all(batch):
+                rows.append(tuple(d.get(name, None) for name in dtype.names))
 
-        param = {
-            "set__" + k: v.value if isinstance(v, Enum) else v
-            for k, v in d.__dict__.items()
+        return to_array(rows, dtype)
+
+    def load_bar_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+    ) -> np.ndarray:
+        filter = {
+            "symbol": symbol,
+            "exchange": exchange.value,
+            "interval": interval.value,
+            "datetime": {"$gte": start, "$lte": end},
         }
-        return param
+        return self.load_arrays(DbBarData, filter, BAR_DTYPE)
 
-    def save_bar_data(self, datas: Sequence[BarData]):
-        for d in datas:
-            updates = self.to_update_param(d)
-            updates.pop("set__gateway_name")
-            updates.pop("set__vt_symbol")
-            (
-                DbBarData.objects(
-                    symbol=d.symbol, interval=d.interval.value, datetime=d.datetime
-                ).update_one(upsert=True, **updates)
+    def load_tick_arrays(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime
+    ) -> np.ndarray:
+        filter = {
+            "symbol": symbol,
+            "exchange": exchange.value,
+            "datetime": {"$gte": start, "$lte": end},
+        }
+        return self.load_arrays(DbTickData, filter, TICK_DTYPE)
+
+    @staticmethod
+    def bulk_upsert(document: type, requests: List[UpdateOne]):
+        """
+        Send upserts with unordered bulk_write on raw collection,
+        skipping validation of Document objects.
+        """
+        collection = document._get_collection()
+
+        for i in range(0, len(requests), MONGO_BATCH_SIZE):
+            collection.bulk_write(
+                requests[i: i + MONGO_BATCH_SIZE],
+                ordered=False
             )
 
+    def save_bar_data(self, datas: Sequence[BarData]):
+        requests = []
+
+        for bar in datas:
+            key = {
+                "symbol": bar.symbol,
+                "exchange": bar.exchange.value,
+                "interval": bar.interval.value,
+                "datetime": convert_datetime(bar.datetime),
+            }
+
+            values = {name: getattr(bar, name) for name in BAR_FIELDS}
+            requests.append(UpdateOne(key, {"$set": values}, upsert=True))
+
+        self.bulk_upsert(DbBarData, requests)
+
     def save_tick_data(self, datas: Sequence[TickData]):
-        for d in datas:
-            updates = self.to_update_param(d)
-            updates.pop("set__gateway_name")
-            updates.pop("set__vt_symbol")
-            (
-                DbTickData.objects(
-                    symbol=d.symbol, exchange=d.exchange.value, datetime=d.datetime
-                ).update_one(upsert=True, **updates)
-            )
+        requests = []
+
+        for tick in datas:
+            key = {
+                "symbol": tick.symbol,
+                "exchange": tick.exchange.value,
+                "datetime": convert_datetime(tick.datetime),
+            }
+
+            values = {name: getattr(tick, name) for name in TICK_FIELDS}
+            values["name"] = tick.name
+            requests.append(UpdateOne(key, {"$set": values}, upsert=True))
+
+        self.bulk_upsert(DbTickData, requests)
 
     def get_newest_bar_data(
         self, symbol: str, exchange: "Exchange", interval: "Interval"
@@ -1,16 +1,23 @@
 """"""
-from datetime import datetime
-from typing import List, Dict, Optional, Sequence, Type
+import re
+import sqlite3
+from datetime import date, datetime, timedelta
+from itertools import repeat
+from typing import List, Dict, Optional, Sequence, Tuple, Type
 
+import numpy as np
 from peewee import (
     AutoField,
     CharField,
     Database,
+    DateField,
     DateTimeField,
     FloatField,
+    IntegerField,
     Model,
     MySQLDatabase,
     PostgresqlDatabase,
+    Select,
     SqliteDatabase,
     chunked,
     fn
@@ -20,7 +27,42 @@ from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
 from vnpy.trader.utility import get_file_path
 
-from .database import BaseDatabaseManager, Driver, DB_TZ
+from .database import (
+    BaseDatabaseManager,
+    Driver,
+    DB_TZ,
+    BAR_FIELDS,
+    TICK_FIELDS,
+    BAR_DTYPE,
+    TICK_DTYPE,
+    to_array
+)
+
+
+# Limit of bound parameters in one statement
+POSTGRESQL_MAX_VARIABLES = 32767
+
+if sqlite3.sqlite_version_info >= (3, 32, 0):
+    SQLITE_MAX_VARIABLES = 32766
+else:
+    SQLITE_MAX_VARIABLES = 999
+
+# Pragmas of SQLite high-ingest profile, durable on application crash
+# but may lose last transactions on power failure.
+SQLITE_INGEST_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": 1,               # NORMAL
+    "cache_size": -64 * 1024,       # 64MB
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": 2,                # MEMORY
+    "wal_autocheckpoint": 10000,
+}
+
+# Monthly tick table, e.g. dbtickdata_202401
+PARTITION_PATTERN = re.compile(r"^dbtickdata_(\d{6})$")
+
+# Interval value of tick data in overview table
+TICK_INTERVAL = "tick"
 
 
 def init(driver: Driver, settings: dict):
@@ -33,13 +75,41 @@ def init(driver: Driver, settings: dict):
 
     db = init_funcs[driver](settings)
     bar, tick = init_models(db, driver)
-    return SqlManager(bar, tick)
+
+    staging = None
+    if driver is Driver.SQLITE and settings.get("staging", False):
+        staging = init_staging(db, tick)
+
+    partitions = None
+    if settings.get("partition", "") == "month":
+        partitions = TickPartitions(db, tick)
+
+    overview = None
+    created = False
+    if settings.get("overview", False):
+        overview, created = init_overview(db)
+
+    manager = SqlManager(bar, tick, staging, partitions, overview)
+
+    # Overview of data saved before is built once
+    if created:
+        manager.rebuild_overview()
+
+    # Ticks left in staging table by killed recorder are merged at start
+    if staging:
+        manager.merge_staging()
+
+    return manager
 
 
 def init_sqlite(settings: dict):
     database = settings["database"]
     path = str(get_file_path(database))
-    db = SqliteDatabase(path)
+
+    if settings.get("profile", "") == "ingest":
+        db = SqliteDatabase(path, pragmas=SQLITE_INGEST_PRAGMAS)
+    else:
+        db = SqliteDatabase(path)
     return db
 
 
@@ -63,6 +133,65 @@ class ModelBase(Model):
         return self.__data__
 
 
+def get_chunk_size(driver: Driver, dicts: List[dict]) -> int:
+    """
+    Rows per insert statement, SQLite chunk is sized to its variable limit.
+    """
+    if driver is Driver.SQLITE and dicts:
+        return max(SQLITE_MAX_VARIABLES // len(dicts[0]), 1)
+    return 50
+
+
+def bulk_upsert(model: Type[Model], dicts: List[dict], conflict_target: tuple):
+    """
+    Insert rows with multi-row INSERT ... ON CONFLICT DO UPDATE, each
+    chunk is written in one round trip.
+
+    Rows with same conflict key (e.g. repeated ticks at close) are
+    deduplicated first with the last one kept, since PostgreSQL cannot
+    update a row twice in one statement.
+    """
+    if not dicts:
+        return
+
+    names = [field.name for field in conflict_target]
+    rows = {}
+    for d in dicts:
+        rows[tuple(d[name] for name in names)] = d
+    dicts = list(rows.values())
+
+    targets = set(names)
+    preserve = [
+        field for field in model._meta.sorted_fields
+        if field.name in dicts[0] and field.name not in targets
+    ]
+
+    chunk_size = max(POSTGRESQL_MAX_VARIABLES // len(dicts[0]), 1)
+
+    for c in chunked(dicts, chunk_size):
+        model.insert_many(c).on_conflict(
+            conflict_target=conflict_target,
+            preserve=preserve,
+        ).execute()
+
+
+def insert_rows(model: Type[Model], dicts: List[dict], replace: bool = False):
+    """
+    Insert rows into SQLite table with one prepared statement executed
+    for all rows, instead of generating SQL of multi-row insert. Rows
+    with same unique key are replaced if replace is True.
+    """
+    names = list(dicts[0])
+    columns = ", ".join(f'"{model._meta.fields[name].column_name}"' for name in names)
+    placeholders = ", ".join(["?"] * len(names))
+
+    verb = "INSERT OR REPLACE" if replace else "INSERT"
+    sql = f'{verb} INTO "{model._meta.table_name}" ({columns}) VALUES ({placeholders})'
+
+    rows = [tuple(d[name] for name in names) for d in dicts]
+    model._meta.database.cursor().executemany(sql, rows)
+
+
 def init_models(db: Database, driver: Driver):
     class DbBarData(ModelBase):
         """
@@ -137,21 +266,30 @@ def init_models(db: Database, driver: Driver):
             """
             save a list of objects, update if exists.
             """
-            dicts = [i.to_dict() for i in objs]
+            DbBarData.save_dicts([i.to_dict() for i in objs])
+
+        @staticmethod
+        def save_dicts(dicts: List[dict]):
+            """
+            save a list of rows, update if exists.
+            """
+            if not dicts:
+                return
+
             with db.atomic():
-                if driver is Driver.POSTGRESQL:
-                    for bar in dicts:
-                        DbBarData.insert(bar).on_conflict(
-                            update=bar,
-                            conflict_target=(
-                                DbBarData.symbol,
-                                DbBarData.exchange,
-                                DbBarData.interval,
-                                DbBarData.datetime,
-                            ),
-                        ).execute()
+                if driver is Driver.SQLITE:
+                    insert_rows(DbBarData, dicts, replace=True)
+                elif driver is Driver.POSTGRESQL:
+                    conflict_target = (
+                        DbBarData.symbol,
+                        DbBarData.exchange,
+                        DbBarData.interval,
+                        DbBarData.datetime,
+                    )
+                    bulk_upsert(DbBarData, dicts, conflict_target)
                 else:
-                    for c in chunked(dicts, 50):
+                    chunk_size = get_chunk_size(driver, dicts)
+                    for c in chunked(dicts, chunk_size):
                         DbBarData.insert_many(
                             c).on_conflict_replace().execute()
 
@@ -241,26 +379,27 @@ def init_models(db: Database, driver: Driver):
             db_tick.bid_volume_1 = tick.bid_volume_1
             db_tick.ask_volume_1 = tick.ask_volume_1
 
-            if tick.bid_price_2:
-                db_tick.bid_price_2 = tick.bid_price_2
-                db_tick.bid_price_3 = tick.bid_price_3
-                db_tick.bid_price_4 = tick.bid_price_4
-                db_tick.bid_price_5 = tick.bid_price_5
+            # Depth fields are always set, since multi-row insert takes
+            # columns from the first row of batch.
+            db_tick.bid_price_2 = tick.bid_price_2
+            db_tick.bid_price_3 = tick.bid_price_3
+            db_tick.bid_price_4 = tick.bid_price_4
+            db_tick.bid_price_5 = tick.bid_price_5
 
-                db_tick.ask_price_2 = tick.ask_price_2
-                db_tick.ask_price_3 = tick.ask_price_3
-                db_tick.ask_price_4 = tick.ask_price_4
-                db_tick.ask_price_5 = tick.ask_price_5
+            db_tick.ask_price_2 = tick.ask_price_2
+            db_tick.ask_price_3 = tick.ask_price_3
+            db_tick.ask_price_4 = tick.ask_price_4
+            db_tick.ask_price_5 = tick.ask_price_5
 
-                db_tick.bid_volume_2 = tick.bid_volume_2
-                db_tick.bid_volume_3 = tick.bid_volume_3
-                db_tick.bid_volume_4 = tick.bid_volume_4
-                db_tick.bid_volume_5 = tick.bid_volume_5
+            db_tick.bid_volume_2 = tick.bid_volume_2
+            db_tick.bid_volume_3 = tick.bid_volume_3
+            db_tick.bid_volume_4 = tick.bid_volume_4
+            db_tick.bid_volume_5 = tick.bid_volume_5
 
-                db_tick.ask_volume_2 = tick.ask_volume_2
-                db_tick.ask_volume_3 = tick.ask_volume_3
-                db_tick.ask_volume_4 = tick.ask_volume_4
-                db_tick.ask_volume_5 = tick.ask_volume_5
+            db_tick.ask_volume_2 = tick.ask_volume_2
+            db_tick.ask_volume_3 = tick.ask_volume_3
+            db_tick.ask_volume_4 = tick.ask_volume_4
+            db_tick.ask_volume_5 = tick.ask_volume_5
 
             return db_tick
 
@@ -313,34 +452,259 @@ def init_models(db: Database, driver: Driver):
 
             return tick
 
-        @staticmethod
-        def save_all(objs: List["DbTickData"]):
-            dicts = [i.to_dict() for i in objs]
+        @classmethod
+        def save_all(cls, objs: List["DbTickData"]):
+            """
+            save a list of objects, update if exists.
+            (saved into the table of cls, which may be a month partition)
+            """
+            cls.save_dicts([i.to_dict() for i in objs])
+
+        @classmethod
+        def save_dicts(cls, dicts: List[dict]):
+            """
+            save a list of rows, update if exists.
+            """
+            if not dicts:
+                return
+
             with db.atomic():
-                if driver is Driver.POSTGRESQL:
-                    for tick in dicts:
-                        DbTickData.insert(tick).on_conflict(
-                            update=tick,
-                            conflict_target=(
-                                DbTickData.symbol,
-                                DbTickData.exchange,
-                                DbTickData.datetime,
-                            ),
-                        ).execute()
+                if driver is Driver.SQLITE:
+                    insert_rows(cls, dicts, replace=True)
+                elif driver is Driver.POSTGRESQL:
+                    conflict_target = (
+                        cls.symbol,
+                        cls.exchange,
+                        cls.datetime,
+                    )
+                    bulk_upsert(cls, dicts, conflict_target)
                 else:
-                    for c in chunked(dicts, 50):
-                        DbTickData.insert_many(c).on_conflict_replace().execute()
+                    chunk_size = get_chunk_size(driver, dicts)
+                    for c in chunked(dicts, chunk_size):
+                        cls.insert_many(c).on_conflict_replace().execute()
 
     db.connect()
     db.create_tables([DbBarData, DbTickData])
     return DbBarData, DbTickData
 
 
+def init_staging(db: Database, class_tick: Type[Model]):
+    class DbTickStaging(class_tick):
+        """
+        Tick table without index, ticks are only appended here during
+        recording session and merged into tick table by merge_staging.
+        """
+
+        class Meta:
+            table_name = "dbtickstaging"
+            indexes = ()
+
+    db.create_tables([DbTickStaging])
+    return DbTickStaging
+
+
+def to_tick_dict(tick: TickData) -> dict:
+    """
+    Generate row of tick table directly, without creating model object.
+    """
+    dt = tick.datetime.astimezone(DB_TZ).replace(tzinfo=None)
+
+    d = {
+        "symbol": tick.symbol,
+        "exchange": tick.exchange.value,
+        "datetime": dt,
+        "name": tick.name,
+    }
+    for name in TICK_FIELDS:
+        d[name] = getattr(tick, name)
+
+    return d
+
+
+def get_month(dt: datetime) -> str:
+    """"""
+    if dt.tzinfo:
+        dt = dt.astimezone(DB_TZ)
+    return dt.strftime("%Y%m")
+
+
+def get_month_range(month: str) -> Tuple[datetime, datetime]:
+    """
+    Return start of the month and start of next month.
+    """
+    start = datetime.strptime(month, "%Y%m")
+    if start.month == 12:
+        end = start.replace(year=start.year + 1, month=1)
+    else:
+        end = start.replace(month=start.month + 1)
+    return start, end
+
+
+class TickPartitions:
+    """
+    Ticks are saved into one table per month (dbtickdata_YYYYMM), each
+    with its own unique index. Queries only touch tables overlapping
+    the time range, and a whole month can be dropped at once.
+    """
+
+    def __init__(self, db: Database, class_tick: Type[Model]):
+        """"""
+        self.db: Database = db
+        self.class_tick: Type[Model] = class_tick
+        self.models: Dict[str, Type[Model]] = {}
+
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Find partition tables in database, which may be created or
+        dropped by other processes (e.g. recorder).
+        """
+        months = set()
+
+        for table in self.db.get_tables():
+            match = PARTITION_PATTERN.match(table)
+            if match:
+                months.add(match.group(1))
+
+        for month in list(self.models):
+            if month not in months:
+                self.models.pop(month)
+
+        for month in months:
+            self.get_model(month)
+
+    def get_model(self, month: str) -> Type[Model]:
+        """
+        Get model of month partition, table is created if not exists.
+        """
+        model = self.models.get(month, None)
+
+        if not model:
+            meta = type("Meta", (), {"table_name": f"dbtickdata_{month}"})
+            model = type(f"DbTickData{month}", (self.class_tick,), {"Meta": meta})
+
+            self.db.create_tables([model])
+            self.models[month] = model
+
+        return model
+
+    def get_models(self, start: datetime = None, end: datetime = None) -> List[Type[Model]]:
+        """
+        Get models of existing partitions overlapping the time range,
+        sorted by month. Tables are rescanned if any month of the range
+        is not known yet.
+        """
+        start_month = get_month(start) if start else ""
+        end_month = get_month(end) if end else "999999"
+
+        if not start or not end:
+            self.refresh()
+        else:
+            month = start_month
+            while month <= end_month:
+                if month not in self.models:
+                    self.refresh()
+                    break
+                month = get_month_range(month)[1].strftime("%Y%m")
+
+        return [
+            self.models[month] for month in sorted(self.models)
+            if start_month <= month <= end_month
+        ]
+
+    def save_dicts(self, dicts: List[dict]) -> None:
+        """"""
+        groups: Dict[str, List[dict]] = {}
+
+        for d in dicts:
+            month = d["datetime"].strftime("%Y%m")
+            groups.setdefault(month, []).append(d)
+
+        for month, group in groups.items():
+            self.get_model(month).save_dicts(group)
+
+    def drop(self, month: str) -> bool:
+        """"""
+        model = self.models.pop(month, None)
+        if not model:
+            return False
+
+        self.db.drop_tables([model])
+        return True
+
+
+def init_overview(db: Database):
+    class DbDataOverview(ModelBase):
+        """
+        Row count and time range of data per symbol, interval and day,
+        updated on every save. Interval of tick data is "tick".
+        """
+
+        id = AutoField()
+        symbol: str = CharField()
+        exchange: str = CharField()
+        interval: str = CharField()
+        day: date = DateField()
+
+        count: int = IntegerField()
+        start: datetime = DateTimeField()
+        end: datetime = DateTimeField()
+
+        class Meta:
+            database = db
+            indexes = ((("symbol", "exchange", "interval", "day"), True),)
+
+    created = not DbDataOverview.table_exists()
+    db.create_tables([DbDataOverview])
+    return DbDataOverview, created
+
+
+def to_date(value) -> date:
+    """
+    Convert result of DATE() into date, which is string in SQLite.
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    elif isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def to_datetime(value) -> datetime:
+    """
+    Convert result of MIN/MAX on datetime column into datetime.
+    """
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
 class SqlManager(BaseDatabaseManager):
 
-    def __init__(self, class_bar: Type[Model], class_tick: Type[Model]):
+    def __init__(
+        self,
+        class_bar: Type[Model],
+        class_tick: Type[Model],
+        class_staging: Type[Model] = None,
+        partitions: TickPartitions = None,
+        class_overview: Type[Model] = None
+    ):
         self.class_bar = class_bar
         self.class_tick = class_tick
+        self.class_staging = class_staging
+        self.partitions = partitions
+        self.class_overview = class_overview
+
+    def get_tick_models(self, start: datetime = None, end: datetime = None) -> List[Type[Model]]:
+        """
+        Get tick tables to query, sorted by time. Ticks saved before
+        partitioning enabled are still kept in the main tick table.
+        """
+        if not self.partitions:
+            return [self.class_tick]
+
+        return [self.class_tick] + self.partitions.get_models(start, end)
 
     def load_bar_data(
         self,
@@ -368,27 +732,591 @@ class SqlManager(BaseDatabaseManager):
     def load_tick_data(
         self, symbol: str, exchange: Exchange, start: datetime, end: datetime
     ) -> Sequence[TickData]:
+        data = []
+
+        for model in self.get_tick_models(start, end):
+            s = (
+                model.select()
+                    .where(
+                    (model.symbol == symbol)
+                    & (model.exchange == exchange.value)
+                    & (model.datetime >= start)
+                    & (model.datetime <= end)
+                )
+                .order_by(model.datetime)
+            )
+
+            data.extend(db_tick.to_tick() for db_tick in s)
+
+        return data
+
+    def load_bar_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+    ) -> np.ndarray:
+        fields = [getattr(self.class_bar, name) for name in BAR_DTYPE.names]
+
         s = (
-            self.class_tick.select()
+            self.class_bar.select(*fields)
                 .where(
-                (self.class_tick.symbol == symbol)
-                & (self.class_tick.exchange == exchange.value)
-                & (self.class_tick.datetime >= start)
-                & (self.class_tick.datetime <= end)
+                (self.class_bar.symbol == symbol)
+                & (self.class_bar.exchange == exchange.value)
+                & (self.class_bar.interval == interval.value)
+                & (self.class_bar.datetime >= start)
+                & (self.class_bar.datetime <= end)
             )
-            .order_by(self.class_tick.datetime)
+            .order_by(self.class_bar.datetime)
+            .tuples()
         )
 
-        data = [db_tick.to_tick() for db_tick in s]
-        return data
+        return to_array(list(s), BAR_DTYPE)
+
+    def load_tick_arrays(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime
+    ) -> np.ndarray:
+        rows = []
+
+        for model in self.get_tick_models(start, end):
+            fields = [getattr(model, name) for name in TICK_DTYPE.names]
+
+            s = (
+                model.select(*fields)
+                    .where(
+                    (model.symbol == symbol)
+                    & (model.exchange == exchange.value)
+                    & (model.datetime >= start)
+                    & (model.datetime <= end)
+                )
+                .order_by(model.datetime)
+                .tuples()
+            )
+
+            rows.extend(s)
+
+        return to_array(rows, TICK_DTYPE)
 
     def save_bar_data(self, datas: Sequence[BarData]):
         ds = [self.class_bar.from_bar(i) for i in datas]
         self.class_bar.save_all(ds)
 
+        if self.class_overview:
+            self.update_bar_overview(
+                [(d.symbol, d.exchange, d.interval, d.datetime) for d in ds]
+            )
+
     def save_tick_data(self, datas: Sequence[TickData]):
-        ds = [self.class_tick.from_tick(i) for i in datas]
-        self.class_tick.save_all(ds)
+        """
+        Rows are generated from ticks directly, without creating model
+        objects.
+        """
+        dicts = [to_tick_dict(i) for i in datas]
+        self.save_tick_dicts(dicts)
+
+    def save_tick_dicts(self, dicts: List[dict]):
+        """
+        Save tick rows into staging table, monthly tables or tick table.
+        """
+        if self.class_staging:
+            self.append_staging(dicts)
+        elif self.partitions:
+            self.partitions.save_dicts(dicts)
+        else:
+            self.class_tick.save_dicts(dicts)
+
+        if self.class_overview:
+            self.update_tick_overview(
+                [(d["symbol"], d["exchange"], d["datetime"]) for d in dicts]
+            )
+
+    def save_bar_arrays(
+        self,
+        array: np.ndarray,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval
+    ):
+        """
+        Rows are generated from array columns directly, without
+        creating BarData or model objects.
+        """
+        if not len(array):
+            return
+
+        dts = array["datetime"].tolist()
+        columns = [array[name].tolist() for name in BAR_FIELDS]
+        names = ["symbol", "exchange", "interval", "datetime"] + BAR_FIELDS
+
+        dicts = [
+            dict(zip(names, row))
+            for row in zip(
+                repeat(symbol), repeat(exchange.value), repeat(interval.value),
+                dts, *columns
+            )
+        ]
+        self.class_bar.save_dicts(dicts)
+
+        if self.class_overview:
+            self.update_bar_overview(
+                [(symbol, exchange.value, interval.value, dt) for dt in dts]
+            )
+
+    def save_tick_arrays(self, array: np.ndarray, symbol: str, exchange: Exchange):
+        """
+        Rows are generated from array columns directly, without
+        creating TickData or model objects.
+        """
+        if not len(array):
+            return
+
+        dts = array["datetime"].tolist()
+        tick_names = np.char.decode(array["name"], "utf-8", errors="ignore").tolist()
+        columns = [array[name].tolist() for name in TICK_FIELDS]
+        names = ["symbol", "exchange", "datetime", "name"] + TICK_FIELDS
+
+        dicts = [
+            dict(zip(names, row))
+            for row in zip(
+                repeat(symbol), repeat(exchange.value), dts, tick_names, *columns
+            )
+        ]
+
+        self.save_tick_dicts(dicts)
+
+    def save_overview(self, rows: List[dict]):
+        """
+        Write full rows of overview table, replacing existing ones.
+        """
+        if not rows:
+            return
+
+        model = self.class_overview
+        db = model._meta.database
+
+        with db.atomic():
+            if isinstance(db, PostgresqlDatabase):
+                conflict_target = (
+                    model.symbol,
+                    model.exchange,
+                    model.interval,
+                    model.day,
+                )
+                bulk_upsert(model, rows, conflict_target)
+            else:
+                for c in chunked(rows, 50):
+                    model.insert_many(c).on_conflict_replace().execute()
+
+    def update_bar_overview(self, keys: List[Tuple[str, str, str, datetime]]):
+        """
+        Recount bars of days saved, with (symbol, exchange, interval,
+        datetime) of bars saved, since saved bars may replace existing
+        ones. Bars of a day are few and found by index.
+        """
+        ranges: Dict[tuple, List[date]] = {}
+
+        for symbol, exchange, interval, dt in keys:
+            key = (symbol, exchange, interval)
+            day = dt.date()
+
+            days = ranges.get(key, None)
+            if days:
+                days[0] = min(days[0], day)
+                days[1] = max(days[1], day)
+            else:
+                ranges[key] = [day, day]
+
+        rows = []
+        for (symbol, exchange, interval), (first, last) in ranges.items():
+            rows.extend(self.count_bars(
+                (self.class_bar.symbol == symbol)
+                & (self.class_bar.exchange == exchange)
+                & (self.class_bar.interval == interval)
+                & (self.class_bar.datetime >= datetime.combine(first, datetime.min.time()))
+                & (self.class_bar.datetime < datetime.combine(last + timedelta(days=1), datetime.min.time()))
+            ))
+
+        self.save_overview(rows)
+
+    def count_bars(self, where=None) -> List[dict]:
+        """
+        Group bars by symbol, exchange, interval and day.
+        """
+        return self.count_rows(self.class_bar, where)
+
+    @staticmethod
+    def count_rows(model: Type[Model], where=None) -> List[dict]:
+        """
+        Group rows of data table by symbol, exchange, (interval) and day.
+        Rows of same datetime are counted once (e.g. duplicated ticks in
+        staging table).
+        """
+        day = fn.DATE(model.datetime)
+
+        keys = [model.symbol, model.exchange]
+        if "interval" in model._meta.fields:
+            keys.append(model.interval)
+
+        s = model.select(
+            *keys,
+            day,
+            fn.COUNT(fn.DISTINCT(model.datetime)),
+            fn.MIN(model.datetime),
+            fn.MAX(model.datetime)
+        )
+        if where is not None:
+            s = s.where(where)
+
+        s = s.group_by(*keys, day).tuples()
+
+        rows = []
+        for values in s:
+            if len(keys) == 3:
+                symbol, exchange, interval_value, day_value, count, start, end = values
+            else:
+                symbol, exchange, day_value, count, start, end = values
+                interval_value = TICK_INTERVAL
+
+            rows.append({
+                "symbol": symbol,
+                "exchange": exchange,
+                "interval": interval_value,
+                "day": to_date(day_value),
+                "count": count,
+                "start": to_datetime(start),
+                "end": to_datetime(end),
+            })
+
+        return rows
+
+    def update_tick_overview(self, keys: List[Tuple[str, str, datetime]]):
+        """
+        Update overview with (symbol, exchange, datetime) of ticks saved.
+        Ticks later than end of day in overview are new ones, and counted
+        incrementally. Days with earlier ticks (e.g. replayed from WAL or
+        saved again) may contain existing ones, so they are recounted.
+        """
+        groups: Dict[tuple, set] = {}
+
+        for symbol, exchange, dt in keys:
+            key = (symbol, exchange, dt.date())
+
+            dts = groups.get(key, None)
+            if dts is None:
+                dts = groups[key] = set()
+            dts.add(dt)
+
+        model = self.class_overview
+        symbols = list({key[0] for key in groups})
+        days = list({key[2] for key in groups})
+
+        s = model.select().where(
+            (model.interval == TICK_INTERVAL)
+            & (model.symbol.in_(symbols))
+            & (model.day.in_(days))
+        )
+
+        existings: Dict[tuple, Model] = {}
+        for existing in s:
+            key = (existing.symbol, existing.exchange, to_date(existing.day))
+            if key in groups:
+                existings[key] = existing
+
+        rows = []
+        for key, dts in groups.items():
+            symbol, exchange, day = key
+            start = min(dts)
+            end = max(dts)
+
+            existing = existings.get(key, None)
+            if not existing:
+                count = len(dts)
+            elif start > to_datetime(existing.end):
+                count = existing.count + len(dts)
+                start = to_datetime(existing.start)
+            else:
+                rows.extend(self.count_ticks(symbol, exchange, day))
+                continue
+
+            rows.append({
+                "symbol": symbol,
+                "exchange": exchange,
+                "interval": TICK_INTERVAL,
+                "day": day,
+                "count": count,
+                "start": start,
+                "end": end,
+            })
+
+        self.save_overview(rows)
+
+    def count_ticks(self, symbol: str, exchange: str, day: date) -> List[dict]:
+        """
+        Count ticks of the day in tick tables and staging table. Datetimes
+        are selected with UNION, so ticks in staging table which are also
+        in tick table (e.g. replayed from WAL) are counted once.
+        """
+        start = datetime.combine(day, datetime.min.time())
+        end = start + timedelta(days=1)
+
+        tick_models = self.get_tick_models(start, end)
+        if self.class_staging:
+            tick_models.append(self.class_staging)
+
+        query = None
+        for model in tick_models:
+            s = model.select(model.datetime).where(
+                (model.symbol == symbol)
+                & (model.exchange == exchange)
+                & (model.datetime >= start)
+                & (model.datetime < end)
+            )
+            query = s if query is None else query | s
+
+        if query is None:
+            return []
+
+        t = query.alias("t")
+        count, first, last = (
+            Select([t], [fn.COUNT(t.c.datetime), fn.MIN(t.c.datetime), fn.MAX(t.c.datetime)])
+            .bind(self.class_tick._meta.database)
+            .scalar(as_tuple=True)
+        )
+        if not count:
+            return []
+
+        return [{
+            "symbol": symbol,
+            "exchange": exchange,
+            "interval": TICK_INTERVAL,
+            "day": day,
+            "count": count,
+            "start": to_datetime(first),
+            "end": to_datetime(last),
+        }]
+
+    @staticmethod
+    def merge_counts(rows: List[dict]) -> List[dict]:
+        """
+        Merge tick counts of same day from different tables.
+        """
+        merged: Dict[tuple, dict] = {}
+
+        for row in rows:
+            key = (row["symbol"], row["exchange"], row["day"])
+
+            existing = merged.get(key, None)
+            if existing:
+                existing["count"] += row["count"]
+                existing["start"] = min(existing["start"], row["start"])
+                existing["end"] = max(existing["end"], row["end"])
+            else:
+                merged[key] = row
+
+        return list(merged.values())
+
+    def rebuild_overview(self):
+        """
+        Rebuild overview table by scanning all data tables.
+        """
+        if not self.class_overview:
+            return
+
+        rows = self.count_bars()
+
+        tick_rows = []
+        for model in self.get_tick_models():
+            tick_rows.extend(self.count_rows(model))
+        tick_rows = self.merge_counts(tick_rows)
+
+        # Days with staged ticks are recounted over both tables, since
+        # staged ticks may duplicate ones in tick table
+        if self.class_staging:
+            recounted = {}
+            for row in self.count_rows(self.class_staging):
+                for r in self.count_ticks(row["symbol"], row["exchange"], row["day"]):
+                    recounted[(r["symbol"], r["exchange"], r["day"])] = r
+
+            tick_rows = [
+                row for row in tick_rows
+                if (row["symbol"], row["exchange"], row["day"]) not in recounted
+            ]
+            tick_rows.extend(recounted.values())
+
+        rows.extend(tick_rows)
+
+        with self.class_overview._meta.database.atomic():
+            self.class_overview.delete().execute()
+            self.save_overview(rows)
+
+    def get_tick_data_statistics(self) -> List[Dict]:
+        """
+        Return tick data avaible in database with a list of symbol/exchange/count.
+        """
+        if self.class_overview:
+            model = self.class_overview
+            s = (
+                model.select(
+                    model.symbol,
+                    model.exchange,
+                    fn.SUM(model.count),
+                    fn.MIN(model.start),
+                    fn.MAX(model.end)
+                )
+                .where(model.interval == TICK_INTERVAL)
+                .group_by(model.symbol, model.exchange)
+                .tuples()
+            )
+
+            return [
+                {
+                    "symbol": symbol,
+                    "exchange": exchange,
+                    "count": count,
+                    "start": to_datetime(start),
+                    "end": to_datetime(end)
+                }
+                for symbol, exchange, count, start, end in s
+            ]
+
+        counts: Dict[tuple, int] = {}
+        for model in self.get_tick_models():
+            s = (
+                model.select(model.symbol, model.exchange, fn.COUNT(model.id))
+                .group_by(model.symbol, model.exchange)
+                .tuples()
+            )
+            for symbol, exchange, count in s:
+                counts[(symbol, exchange)] = counts.get((symbol, exchange), 0) + count
+
+        return [
+            {"symbol": symbol, "exchange": exchange, "count": count}
+            for (symbol, exchange), count in counts.items()
+        ]
+
+    def get_data_coverage(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Optional[Interval] = None
+    ) -> List[Dict]:
+        """
+        Return count and time range of each day with data, for tick
+        data if interval is None. Only available with overview enabled.
+        """
+        if not self.class_overview:
+            return []
+
+        model = self.class_overview
+        interval_value = interval.value if interval else TICK_INTERVAL
+
+        s = (
+            model.select()
+            .where(
+                (model.symbol == symbol)
+                & (model.exchange == exchange.value)
+                & (model.interval == interval_value)
+            )
+            .order_by(model.day)
+        )
+
+        return [
+            {
+                "day": to_date(data.day),
+                "count": data.count,
+                "start": to_datetime(data.start),
+                "end": to_datetime(data.end)
+            }
+            for data in s
+        ]
+
+    def append_staging(self, dicts: List[dict]):
+        """
+        Plain insert of tick rows into staging table, no index to maintain.
+        """
+        if not dicts:
+            return
+
+        with self.class_staging._meta.database.atomic():
+            insert_rows(self.class_staging, dicts)
+
+    def merge_staging(self) -> int:
+        """
+        Move staged ticks into tick table, later tick replaces earlier
+        one with same symbol/exchange/datetime.
+        """
+        if not self.class_staging:
+            return 0
+
+        staging = self.class_staging
+        names = [f.name for f in self.class_tick._meta.sorted_fields if f.name != "id"]
+        columns = [getattr(staging, name) for name in names]
+
+        with staging._meta.database.atomic():
+            count = staging.select().count()
+            if not count:
+                return 0
+
+            # Days of staged ticks are recounted after merge, since staged
+            # ticks may duplicate ones already in tick table.
+            if self.class_overview:
+                staged_rows = self.count_rows(staging)
+
+            if not self.partitions:
+                self.class_tick.insert_from(
+                    staging.select(*columns).order_by(staging.id),
+                    [getattr(self.class_tick, name) for name in names]
+                ).on_conflict_replace().execute()
+            else:
+                first, last = staging.select(
+                    fn.MIN(staging.datetime), fn.MAX(staging.datetime)
+                ).scalar(as_tuple=True)
+
+                month = get_month(first)
+                while month <= get_month(last):
+                    model = self.partitions.get_model(month)
+                    month_start, month_end = get_month_range(month)
+
+                    model.insert_from(
+                        staging.select(*columns)
+                        .where(
+                            (staging.datetime >= month_start)
+                            & (staging.datetime < month_end)
+                        )
+                        .order_by(staging.id),
+                        [getattr(model, name) for name in names]
+                    ).on_conflict_replace().execute()
+
+                    month = month_end.strftime("%Y%m")
+
+            staging.delete().execute()
+
+            if self.class_overview:
+                rows = []
+                for row in staged_rows:
+                    rows.extend(self.count_ticks(row["symbol"], row["exchange"], row["day"]))
+                self.save_overview(rows)
+
+        return count
+
+    def drop_tick_partition(self, month: str) -> bool:
+        """
+        Drop all ticks of the month (YYYYMM) with its partition table.
+        """
+        if not self.partitions:
+            return False
+
+        if self.class_overview:
+            month_start, month_end = get_month_range(month)
+            self.class_overview.delete().where(
+                (self.class_overview.interval == TICK_INTERVAL)
+                & (self.class_overview.day >= month_start.date())
+                & (self.class_overview.day < month_end.date())
+            ).execute()
+
+        return self.partitions.drop(month)
 
     def get_newest_bar_data(
         self, symbol: str, exchange: "Exchange", interval: "Interval"
@@ -427,21 +1355,50 @@ class SqlManager(BaseDatabaseManager):
     def get_newest_tick_data(
         self, symbol: str, exchange: "Exchange"
     ) -> Optional["TickData"]:
-        s = (
-            self.class_tick.select()
-                .where(
-                (self.class_tick.symbol == symbol)
-                & (self.class_tick.exchange == exchange.value)
+        for model in reversed(self.get_tick_models()):
+            s = (
+                model.select()
+                    .where(
+                    (model.symbol == symbol)
+                    & (model.exchange == exchange.value)
+                )
+                .order_by(model.datetime.desc())
+                .first()
             )
-            .order_by(self.class_tick.datetime.desc())
-            .first()
-        )
-        if s:
-            return s.to_tick()
+            if s:
+                return s.to_tick()
         return None
 
     def get_bar_data_statistics(self) -> List[Dict]:
         """"""
+        if self.class_overview:
+            model = self.class_overview
+            s = (
+                model.select(
+                    model.symbol,
+                    model.exchange,
+                    model.interval,
+                    fn.SUM(model.count),
+                    fn.MIN(model.start),
+                    fn.MAX(model.end)
+                )
+                .where(model.interval != TICK_INTERVAL)
+                .group_by(model.symbol, model.exchange, model.interval)
+                .tuples()
+            )
+
+            return [
+                {
+                    "symbol": symbol,
+                    "exchange": exchange,
+                    "interval": interval,
+                    "count": count,
+                    "start": to_datetime(start),
+                    "end": to_datetime(end)
+                }
+                for symbol, exchange, interval, count, start, end in s
+            ]
+
         s = (
             self.class_bar.select(
                 self.class_bar.symbol,
@@ -482,8 +1439,21 @@ class SqlManager(BaseDatabaseManager):
             & (self.class_bar.interval == interval.value)
         )
         count = query.execute()
+
+        if self.class_overview:
+            self.class_overview.delete().where(
+                (self.class_overview.symbol == symbol)
+                & (self.class_overview.exchange == exchange.value)
+                & (self.class_overview.interval == interval.value)
+            ).execute()
+
         return count
 
     def clean(self, symbol: str):
         self.class_bar.delete().where(self.class_bar.symbol == symbol).execute()
-        self.class_tick.delete().where(self.class_tick.symbol == symbol).execute()
+        for model in self.get_tick_models():
+            model.delete().where(model.symbol == symbol).execute()
+        if self.class_staging:
+            self.class_staging.delete().where(self.class_staging.symbol == symbol).execute()
+        if self.class_overview:
+            self.class_overview.delete().where(self.class_overview.symbol == symbol).execute()
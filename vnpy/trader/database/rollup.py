@@ -0,0 +1,243 @@
+"""
+Batch rollup of stored ticks into bars.
+
+Ticks are loaded as arrays one trading day at a time, converted from
+database timezone into China time, filtered by trading sessions of the
+contract, and aggregated into minute, hour and daily bars with
+vectorized group-by on bucket of timestamp. Result is
+written back with save_bar_data, and cached chunks of these days are
+invalidated in range_cache.
+
+Bars follow the same rules as BarGenerator: bar is labeled with start
+of its bucket, volume is sum of increase of cumulative tick volume, and
+open interest is taken from the last tick.
+"""
+
+from datetime import datetime, date, time, timedelta
+from typing import Callable, Dict, List, Sequence, Union
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+from vnpy.trader.session import (
+    CHINA_TZ,
+    TradingSessionCalendar,
+    compile_sessions,
+    merge_intervals
+)
+
+from .database import (
+    BaseDatabaseManager,
+    DB_TZ,
+    BAR_FIELDS,
+    BAR_DTYPE,
+    convert_timezone
+)
+from .cache import range_cache
+
+
+# Ticks after this hour belong to night session of next trading day
+NIGHT_START_HOUR = 18
+
+
+def get_session_mask(
+    dts: np.ndarray,
+    symbol: str,
+    exchange: Exchange,
+    calendar: TradingSessionCalendar
+) -> np.ndarray:
+    """
+    Mark ticks inside trading sessions of the contract.
+    """
+    sessions = calendar.get_sessions(symbol, exchange)
+
+    days = dts.astype("M8[D]")
+    minutes = (dts.astype("M8[m]") - days).astype(np.int64)
+    mask = np.zeros(len(dts), dtype=bool)
+
+    for day in np.unique(days):
+        bounds = merge_intervals(compile_sessions(sessions, day.item()))
+        selected = days == day
+        positions = np.searchsorted(bounds, minutes[selected], side="right")
+        mask[selected] = (positions & 1).astype(bool)
+
+    return mask
+
+
+def get_trading_days(dts: np.ndarray) -> np.ndarray:
+    """
+    Vectorized trading day of datetimes, night session is counted into
+    next weekday (holidays are not considered).
+    """
+    shifted = dts + np.timedelta64(24 - NIGHT_START_HOUR, "h")
+    return np.busday_offset(shifted.astype("M8[D]"), 0, roll="forward")
+
+
+def get_buckets(dts: np.ndarray, interval: Interval, window: int = 1) -> np.ndarray:
+    """
+    Get bucket start of every datetime, used as group key and bar datetime.
+    """
+    if interval == Interval.MINUTE:
+        minutes = dts.astype("M8[m]").astype(np.int64)
+        return (minutes - minutes % window).astype("M8[m]").astype("M8[us]")
+    elif interval == Interval.HOUR:
+        hours = dts.astype("M8[h]").astype(np.int64)
+        return (hours - hours % window).astype("M8[h]").astype("M8[us]")
+    elif interval == Interval.DAILY:
+        return get_trading_days(dts).astype("M8[us]")
+
+    raise ValueError(f"不支持的K线周期：{interval}")
+
+
+def aggregate_ticks(
+    ticks: np.ndarray,
+    interval: Interval,
+    window: int = 1
+) -> np.ndarray:
+    """
+    Aggregate sorted tick array (TICK_DTYPE) of one trading day into
+    bar array (BAR_DTYPE), datetime of ticks is in China time.
+    """
+    bars = np.empty(0, dtype=BAR_DTYPE)
+    if not len(ticks):
+        return bars
+
+    buckets = get_buckets(ticks["datetime"], interval, window)
+
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:], len(ticks)) - 1
+
+    prices = ticks["last_price"]
+
+    # Volume of tick is cumulative in trading day
+    increments = np.diff(ticks["volume"], prepend=ticks["volume"][0])
+    increments = np.maximum(increments, 0)
+
+    bars = np.zeros(len(starts), dtype=BAR_DTYPE)
+    bars["datetime"] = buckets[starts]
+    bars["open_price"] = prices[starts]
+    bars["high_price"] = np.maximum.reduceat(prices, starts)
+    bars["low_price"] = np.minimum.reduceat(prices, starts)
+    bars["close_price"] = prices[ends]
+    bars["volume"] = np.add.reduceat(increments, starts)
+    bars["open_interest"] = ticks["open_interest"][ends]
+
+    return bars
+
+
+def to_bars(
+    array: np.ndarray,
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval
+) -> List[BarData]:
+    """"""
+    bars = [
+        BarData(
+            symbol=symbol,
+            exchange=exchange,
+            datetime=DB_TZ.localize(dt),
+            interval=interval,
+            gateway_name="DB",
+        )
+        for dt in array["datetime"].tolist()
+    ]
+
+    for name in BAR_FIELDS:
+        for bar, value in zip(bars, array[name].tolist()):
+            setattr(bar, name, value)
+
+    return bars
+
+
+def to_db_naive(dt: datetime) -> datetime:
+    """
+    Convert naive datetime in China time into database timezone.
+    """
+    return CHINA_TZ.localize(dt).astimezone(DB_TZ).replace(tzinfo=None)
+
+
+def rollup_ticks(
+    symbol: str,
+    exchange: Exchange,
+    start: date,
+    end: date,
+    intervals: Sequence[Interval] = (Interval.MINUTE, Interval.HOUR, Interval.DAILY),
+    database_manager: BaseDatabaseManager = None,
+    windows: Sequence[int] = (),
+    on_window: Callable[[int, np.ndarray], None] = None
+) -> Dict[Union[Interval, int], int]:
+    """
+    Rollup stored ticks of trading days from start to end (both included)
+    into bars, return count of bars for each interval and window.
+
+    N-minute bars of windows cannot be saved into database (no such
+    interval), bar array of each trading day is passed to on_window
+    with the window instead.
+    """
+    if not database_manager:
+        from vnpy.trader.database import database_manager
+
+    calendar = TradingSessionCalendar()
+    counts = {interval: 0 for interval in intervals}
+    for window in windows:
+        counts[window] = 0
+
+    trading_days = np.arange(
+        np.busday_offset(np.datetime64(start, "D"), 0, roll="forward"),
+        np.datetime64(end, "D") + 1,
+        dtype="M8[D]"
+    )
+    trading_days = trading_days[np.is_busday(trading_days)]
+
+    for trading_day in trading_days:
+        # Ticks of trading day start from night session of previous weekday
+        previous_day = np.busday_offset(trading_day, -1)
+
+        day_start = datetime.combine(previous_day.item(), time(NIGHT_START_HOUR))
+        day_end = datetime.combine(trading_day.item(), time(NIGHT_START_HOUR))
+        day_end -= timedelta(microseconds=1)
+
+        ticks = database_manager.load_tick_arrays(
+            symbol, exchange, to_db_naive(day_start), to_db_naive(day_end)
+        )
+        if not len(ticks):
+            continue
+
+        # Sessions and buckets are in China time
+        ticks = ticks[ticks["last_price"] > 0]
+        ticks["datetime"] = convert_timezone(ticks["datetime"], DB_TZ, CHINA_TZ)
+        ticks = ticks[get_session_mask(ticks["datetime"], symbol, exchange, calendar)]
+
+        for interval in intervals:
+            array = aggregate_ticks(ticks, interval)
+            if not len(array):
+                continue
+
+            array["datetime"] = convert_timezone(array["datetime"], CHINA_TZ, DB_TZ)
+
+            bars = to_bars(array, symbol, exchange, interval)
+            database_manager.save_bar_data(bars)
+            counts[interval] += len(bars)
+
+            range_cache.invalidate(
+                symbol,
+                exchange,
+                interval,
+                array["datetime"][0].item(),
+                array["datetime"][-1].item()
+            )
+
+        for window in windows:
+            array = aggregate_ticks(ticks, Interval.MINUTE, window)
+            if not len(array):
+                continue
+
+            array["datetime"] = convert_timezone(array["datetime"], CHINA_TZ, DB_TZ)
+
+            if on_window:
+                on_window(window, array)
+            counts[window] += len(array)
+
+    return counts
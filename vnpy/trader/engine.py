@@ -53,7 +53,13 @@ class MainEngine:
         if event_engine:
             self.event_engine: EventEngine = event_engine
         else:
-            self.event_engine = EventEngine()
+            self.event_engine = EventEngine(
+                lanes=SETTINGS["event.lanes"],
+                priority=SETTINGS["event.priority"],
+                batch_size=SETTINGS["event.batch_size"],
+                topics=SETTINGS["event.topics"],
+                metrics=SETTINGS["event.metrics"]
+            )
         self.event_engine.start()
 
         self.gateways: Dict[str, BaseGateway] = {}
@@ -131,6 +137,20 @@ class MainEngine:
             self.write_log(f"找不到引擎：{engine_name}")
         return engine
 
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get snapshot of event engine metrics (None if not enabled), and
+        statistics of engines providing get_statistics (e.g. recorder).
+        """
+        metrics = {"event": self.event_engine.get_metrics()}
+
+        for engine_name, engine in self.engines.items():
+            get_statistics = getattr(engine, "get_statistics", None)
+            if get_statistics:
+                metrics[engine_name] = get_statistics()
+
+        return metrics
+
     def get_default_setting(self, gateway_name: str) -> Optional[Dict[str, Any]]:
         """
         Get default setting dict of a specific gateway.
@@ -377,7 +397,10 @@ class OmsEngine(BaseEngine):
         self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
 
     def process_tick_event(self, event: Event) -> None:
-        """"""
+        """
+        Registered as normal handler, so that tick cache is updated
+        before other apps read it in their tick handlers.
+        """
         tick = event.data
         self.ticks[tick.vt_symbol] = tick
 
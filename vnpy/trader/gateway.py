@@ -87,10 +87,10 @@ class BaseGateway(ABC):
     def on_tick(self, tick: TickData) -> None:
         """
         Tick event push.
-        Tick event of a specific vt_symbol is also pushed.
+        Handlers of a specific vt_symbol (EVENT_TICK + vt_symbol) are
+        called by topic of this event in event engine.
         """
         self.on_event(EVENT_TICK, tick)
-        self.on_event(EVENT_TICK + tick.vt_symbol, tick)
 
     def on_trade(self, trade: TradeData) -> None:
         """
@@ -0,0 +1,205 @@
+"""
+Trading session calendar of Chinese futures market.
+"""
+
+import re
+from bisect import bisect_right
+from datetime import datetime, date, time
+from typing import Dict, List, Tuple
+
+from pytz import timezone
+
+from .constant import Exchange
+
+
+# Sessions are defined in local time of Chinese futures market
+CHINA_TZ = timezone("Asia/Shanghai")
+
+# Sessions include the call auction minute before open, and the end
+# minute is included (tick at close time is kept).
+COMMODITY_DAY = [
+    (time(8, 59), time(10, 15)),
+    (time(10, 30), time(11, 30)),
+    (time(13, 30), time(15, 0)),
+]
+
+NIGHT_2300 = [(time(20, 59), time(23, 0))]
+NIGHT_0100 = [(time(20, 59), time(1, 0))]
+NIGHT_0230 = [(time(20, 59), time(2, 30))]
+
+CFFEX_INDEX = [
+    (time(9, 29), time(11, 30)),
+    (time(13, 0), time(15, 0)),
+]
+
+CFFEX_BOND = [
+    (time(9, 29), time(11, 30)),
+    (time(13, 0), time(15, 15)),
+]
+
+EXCHANGE_SESSIONS: Dict[Exchange, List[Tuple[time, time]]] = {
+    Exchange.SHFE: COMMODITY_DAY + NIGHT_2300,
+    Exchange.INE: COMMODITY_DAY + NIGHT_2300,
+    Exchange.DCE: COMMODITY_DAY + NIGHT_2300,
+    Exchange.CZCE: COMMODITY_DAY + NIGHT_2300,
+    Exchange.CFFEX: CFFEX_INDEX,
+}
+
+PRODUCT_SESSIONS: Dict[str, List[Tuple[time, time]]] = {}
+
+for product in ["au", "ag", "sc"]:
+    PRODUCT_SESSIONS[product] = COMMODITY_DAY + NIGHT_0230
+
+for product in ["cu", "al", "zn", "pb", "ni", "sn", "ss", "bc"]:
+    PRODUCT_SESSIONS[product] = COMMODITY_DAY + NIGHT_0100
+
+for product in [
+    "wr", "jd", "lh", "fb", "bb",
+    "AP", "CJ", "SF", "SM", "UR", "PK", "JR", "LR", "RS", "RI", "WH", "PM"
+]:
+    PRODUCT_SESSIONS[product] = COMMODITY_DAY
+
+for product in ["T", "TF", "TS"]:
+    PRODUCT_SESSIONS[product] = CFFEX_BOND
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def to_minute(t: time) -> int:
+    """"""
+    return t.hour * 60 + t.minute
+
+
+def merge_intervals(intervals: List[Tuple[int, int]]) -> List[int]:
+    """
+    Merge [start, end) intervals and flatten them into sorted bounds,
+    so that a minute is inside when bisect_right(bounds, minute) is odd.
+    """
+    bounds: List[int] = []
+
+    for start, end in sorted(intervals):
+        if bounds and start <= bounds[-1]:
+            bounds[-1] = max(bounds[-1], end)
+        else:
+            bounds.extend([start, end])
+
+    return bounds
+
+
+def compile_sessions(
+    sessions: List[Tuple[time, time]],
+    day: date,
+    lead: int = 0,
+    lag: int = 0
+) -> List[Tuple[int, int]]:
+    """
+    Convert sessions into minute-of-day intervals of the natural day.
+
+    Day session and the evening part of night session are open from
+    Monday to Friday, the part of night session after midnight from
+    Tuesday to Saturday (holidays are not considered).
+    """
+    weekday = day.weekday()
+    intervals = []
+
+    for start_time, end_time in sessions:
+        start = to_minute(start_time) - lead
+        end = to_minute(end_time) + 1 + lag
+
+        # Session crossing midnight
+        if start_time > end_time:
+            if weekday < 5:
+                intervals.append((start, MINUTES_PER_DAY))
+            if 1 <= weekday <= 5:
+                intervals.append((0, end))
+        elif weekday < 5:
+            intervals.append((max(start, 0), min(end, MINUTES_PER_DAY)))
+
+    return intervals
+
+
+class TradingSessionCalendar:
+    """
+    Check whether a datetime is in trading session of a contract.
+
+    Session table of every contract is compiled into sorted minute
+    bounds once per day, then each check is a bisect on the table.
+    """
+
+    def __init__(self):
+        """"""
+        self.day: date = None
+        self.tables: Dict[str, List[int]] = {}
+        self.recording_tables: Dict[Tuple[int, int], List[int]] = {}
+
+    @staticmethod
+    def get_product(symbol: str) -> str:
+        """
+        Get product code from symbol, e.g. rb2205 -> rb.
+        """
+        return re.match(r"^[a-zA-Z]*", symbol).group()
+
+    def get_sessions(self, symbol: str, exchange: Exchange) -> List[Tuple[time, time]]:
+        """"""
+        product = self.get_product(symbol)
+
+        sessions = PRODUCT_SESSIONS.get(product, None)
+        if sessions:
+            return sessions
+
+        return EXCHANGE_SESSIONS.get(exchange, COMMODITY_DAY + NIGHT_2300)
+
+    def check_day(self, day: date) -> None:
+        """
+        Clear compiled tables when day changes.
+        """
+        if day != self.day:
+            self.day = day
+            self.tables.clear()
+            self.recording_tables.clear()
+
+    def get_table(self, vt_symbol: str) -> List[int]:
+        """"""
+        table = self.tables.get(vt_symbol, None)
+
+        if table is None:
+            symbol, exchange_str = vt_symbol.split(".")
+            sessions = self.get_sessions(symbol, Exchange(exchange_str))
+
+            table = merge_intervals(compile_sessions(sessions, self.day))
+            self.tables[vt_symbol] = table
+
+        return table
+
+    def is_trading(self, vt_symbol: str, dt: datetime) -> bool:
+        """
+        Whether datetime is in trading session of the contract.
+        """
+        self.check_day(dt.date())
+
+        table = self.get_table(vt_symbol)
+        minute = dt.hour * 60 + dt.minute
+        return bool(bisect_right(table, minute) & 1)
+
+    def is_recording_time(self, dt: datetime, lead: int = 15, lag: int = 30) -> bool:
+        """
+        Whether any contract is trading, with lead minutes before
+        session open and lag minutes after session close.
+        """
+        self.check_day(dt.date())
+
+        key = (lead, lag)
+        table = self.recording_tables.get(key, None)
+
+        if table is None:
+            all_sessions = list(EXCHANGE_SESSIONS.values()) + list(PRODUCT_SESSIONS.values())
+
+            intervals = []
+            for sessions in all_sessions:
+                intervals.extend(compile_sessions(sessions, self.day, lead, lag))
+
+            table = merge_intervals(intervals)
+            self.recording_tables[key] = table
+
+        minute = dt.hour * 60 + dt.minute
+        return bool(bisect_right(table, minute) & 1)
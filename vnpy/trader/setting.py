@@ -29,12 +29,26 @@ SETTINGS: Dict[str, Any] = {
 
     "database.timezone": get_localzone().zone,
     "database.driver": "sqlite",                # see database.Driver
-    "database.database": "database.db",         # for sqlite, use this as filepath
+    "database.database": "database.db",         # for sqlite/archive, use this as file/folder path
     "database.host": "localhost",
     "database.port": 3306,
     "database.user": "root",
     "database.password": "",
     "database.authentication_source": "admin",  # for mongodb
+    "database.profile": "",                     # for sqlite, "ingest" for high-ingest recording
+    "database.staging": False,                  # for sqlite, append ticks into staging table
+    "database.partition": "",                   # for sql, "month" to save ticks into monthly tables
+    "database.overview": False,                 # for sql, maintain data overview table on save
+    "database.batch_size": 10000,               # for influxdb, points per write/query chunk
+    "database.time_precision": "ms",            # for influxdb, one of "s", "ms", "u", "n"
+
+    "cache.disk": False,                        # persist history cache of backtesting as .npy files
+
+    "event.lanes": False,                       # process market/trading/housekeeping events in separate threads
+    "event.priority": False,                    # process order/trade events before others in queue
+    "event.batch_size": 1,                      # max events drained and dispatched at each wakeup
+    "event.topics": True,                       # route ticks to handlers of EVENT_TICK + vt_symbol
+    "event.metrics": False,                     # measure event latency and handler time, see EVENT_METRICS
 
     "genus.parent_host": "",
     "genus.parent_port": "",